@@ -0,0 +1,171 @@
+'''
+Cost-aware admission control for the solves of one server worker.
++ The cost of a request is estimated before it runs, as a number of node
+expansions, from the open cells of the grid, the number of goals and the
+algorithm (and the depth limit of the depth limited searches, or the node cap of SMA*).
++ Cheap and expensive requests go to separate lanes, each with its own number of
+solves running at once, so a 10x10 BFS never waits behind a 300x300 IDS.
++ A parallel IDS or IDA* forks a pool of workers, each building the maze again, so
+it goes to a lane of its own whatever its cost, which bounds the number of pools
+running at once, and the builds of its workers are added to its cost.
++ Inside a lane, the cheapest waiting request runs first.
++ A request whose estimated wait in its lane is longer than the limit is rejected
+straight away, with the number of seconds after which it may be retried, instead
+of waiting without bound.
+'''
+
+'''
+========= Step 1 =========
+Import necessary libraries
+'''
+import asyncio
+import heapq
+import math
+import os
+from contextlib import asynccontextmanager
+from sma import DEFAULT_MAX_NODES
+
+# the expansions done per second by one solve, used to turn costs into waiting times
+EXPANSIONS_PER_SECOND = float(os.environ.get('MAZE_EXPANSIONS_PER_SECOND', '50000'))
+# the requests estimated to cost more expansions than this go to the slow lane
+FAST_LANE_COST = float(os.environ.get('MAZE_FAST_LANE_COST', '50000'))
+# the solves running at once in each lane
+FAST_LANE_SLOTS = int(os.environ.get('MAZE_FAST_LANE_SLOTS', '2'))
+SLOW_LANE_SLOTS = int(os.environ.get('MAZE_SLOW_LANE_SLOTS', '1'))
+# the parallel searches running at once, each with its own pool of workers
+PARALLEL_LANE_SLOTS = int(os.environ.get('MAZE_PARALLEL_LANE_SLOTS', '1'))
+# the longest estimated wait before a request is rejected, in seconds
+MAX_QUEUE_SECONDS = float(os.environ.get('MAZE_MAX_QUEUE_SECONDS', '10'))
+
+"""
+========= Step 2 =========
+Define the estimated cost of a request, in node expansions
+"""
+def estimate_cost(algorithm, size, open_cells, num_goals, depth_limit=None, max_nodes=None, workers=1):
+    rows, cols = size
+    legs = max(num_goals, 1)
+    if algorithm in ['depthlimited', 'ids', 'idas']:
+        # the depth limited searches explore a cell once per depth it is reached at, up to the limit
+        limit = min(depth_limit or 100, rows * cols)
+        if algorithm == 'depthlimited':
+            return open_cells * min(limit, 4) * legs
+        # every iteration of IDS searches again down to its limit, IDA* prunes with the heuristic
+        cost = open_cells * limit * legs / (2 if algorithm == 'ids' else 8)
+        if workers > 1:
+            # every worker of the pool builds the maze again before it searches
+            cost += open_cells * workers
+        return cost
+    if algorithm == 'hpa':
+        # the abstraction is built over the whole grid once, then the queries only search a few clusters
+        return open_cells + open_cells * legs / 10
+    if algorithm == 'smas':
+        # once its tree is full, SMA* expands the forgotten subtrees again, more often the smaller the tree
+        return open_cells * legs * min(max(open_cells / (max_nodes or DEFAULT_MAX_NODES), 1), 8)
+    # BFS, DFS, GBFS, A* and backtracking expand each open cell at most once per goal
+    return open_cells * legs
+
+"""
+========= Step 3 =========
+Define a lane, which runs at most a number of solves at once and lets the cheapest waiting one go first
+"""
+class Lane:
+    def __init__(self, name, slots):
+        self.name = name
+        self.slots = slots
+        self.running = 0
+        self.running_cost = 0
+        self.waiting = [] # heap of (cost, order, future)
+        self.waiting_cost = 0
+        self.order = 0
+        self.rejected = 0
+
+    ''' Define a function to estimate how long a request of this cost would wait, in seconds'''
+    def wait_time(self, cost):
+        if self.running < self.slots and not self.waiting:
+            return 0.0
+        # the waiting requests cheaper than this one run before it
+        ahead = sum(waiting_cost for waiting_cost, _, future in self.waiting if waiting_cost <= cost and not future.done())
+        return (self.running_cost + ahead) / self.slots / EXPANSIONS_PER_SECOND
+
+    ''' Define a function to wait for a slot in the lane'''
+    async def acquire(self, cost):
+        if self.running < self.slots and not self.waiting:
+            self.running += 1
+            self.running_cost += cost
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiting, (cost, self.order, future))
+        self.order += 1
+        self.waiting_cost += cost
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # the slot was handed over just before the cancellation, so it is given back
+                self.release(cost)
+            else:
+                self.waiting_cost -= cost
+            raise
+
+    ''' Define a function to give a slot back, handing it over to the cheapest waiting request'''
+    def release(self, cost):
+        self.running_cost -= cost
+        while self.waiting:
+            waiting_cost, _, future = heapq.heappop(self.waiting)
+            if future.done():
+                continue
+            self.waiting_cost -= waiting_cost
+            self.running_cost += waiting_cost
+            future.set_result(None)
+            return
+        self.running -= 1
+
+    def stats(self):
+        return {
+            'slots': self.slots,
+            'running': self.running,
+            'queued': sum(1 for _, _, future in self.waiting if not future.done()),
+            'queued_cost': self.waiting_cost,
+            'rejected': self.rejected
+        }
+
+"""
+========= Step 4 =========
+Define the AdmissionControl class, which sends every request to its lane or rejects it
+"""
+class Overloaded(Exception):
+    def __init__(self, lane, retry_after):
+        super().__init__(f'The {lane} lane is full, retry after {retry_after}s')
+        self.lane = lane
+        self.retry_after = retry_after
+
+class AdmissionControl:
+    def __init__(self, fast_lane_cost=FAST_LANE_COST, fast_slots=FAST_LANE_SLOTS, slow_slots=SLOW_LANE_SLOTS,
+                 max_queue_seconds=MAX_QUEUE_SECONDS, parallel_slots=PARALLEL_LANE_SLOTS):
+        self.fast_lane_cost = fast_lane_cost
+        self.max_queue_seconds = max_queue_seconds
+        self.lanes = {'fast': Lane('fast', fast_slots), 'slow': Lane('slow', slow_slots),
+                      'parallel': Lane('parallel', parallel_slots)}
+
+    def lane_for(self, cost, workers=1):
+        if workers > 1:
+            return self.lanes['parallel']
+        return self.lanes['fast' if cost <= self.fast_lane_cost else 'slow']
+
+    ''' Define a function to hold a slot of the lane of a request while it runs, or raise Overloaded'''
+    @asynccontextmanager
+    async def slot(self, cost, workers=1):
+        lane = self.lane_for(cost, workers)
+        wait = lane.wait_time(cost)
+        if wait > self.max_queue_seconds:
+            lane.rejected += 1
+            # by then the lane should have worked through enough of its queue to take the request
+            raise Overloaded(lane.name, max(1, math.ceil(wait - self.max_queue_seconds)))
+        await lane.acquire(cost)
+        try:
+            yield lane
+        finally:
+            lane.release(cost)
+
+    def stats(self):
+        return {name: lane.stats() for name, lane in self.lanes.items()}
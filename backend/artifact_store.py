@@ -0,0 +1,171 @@
+'''
+On-disk store of the arrays precomputed for a maze (its connected components and
+the landmark distance tables of the ALT heuristic), shared by every process of the host.
++ Content addressed: the arrays of a maze live under the hash of its grid, so a
+worker which gets a maze another worker (or an earlier run) has seen maps the
+same files instead of computing them again.
++ Memory mapped: the arrays are .npy files opened with numpy in read-only mmap
+mode, so all the workers share the pages of the OS cache, without copies.
++ Bounded: once the store grows past its size cap, the least recently used files
+are removed. Reading a file touches its modification time, which is what the
+eviction sorts on, so the order is shared by all the processes. Every store keeps
+a running count of the bytes stored, taken from a scan of the files and then
+increased by its own writes, and only scans the files again to evict once the
+count passes the cap, then removes files down to EVICT_TO of the cap.
+
+Writes go to a unique temporary file which is then renamed, so a reader never sees
+a half written array, and a file removed by the eviction stays valid for the
+processes which already mapped it. Two threads or processes storing the same
+artifact write the same bytes, so the one whose rename loses the race just keeps
+the file of the other.
+'''
+
+'''
+========= Step 1 =========
+Import necessary libraries
+'''
+import hashlib
+import os
+import tempfile
+import threading
+import numpy as np
+
+# where the store lives and how large it may grow, unless given to ArtifactStore
+DEFAULT_ROOT = os.environ.get('MAZE_ARTIFACT_DIR', os.path.join(tempfile.gettempdir(), 'maze-artifacts'))
+DEFAULT_MAX_BYTES = int(os.environ.get('MAZE_ARTIFACT_MAX_MB', '512')) * 1024 * 1024
+
+# an eviction brings the store down to this fraction of its cap, so the next writes do not scan it again at once
+EVICT_TO = 0.9
+
+"""
+========= Step 2 =========
+Define the key of a maze, which only depends on its grid
+"""
+def wall_grid(size, walls):
+    # the walls as a uint8 grid indexed [y][x], 1 for a wall
+    rows, cols = size
+    grid = np.zeros((rows, cols), dtype=np.uint8)
+    cells = [(y, x) for x, y in walls if 0 <= x < cols and 0 <= y < rows]
+    if cells:
+        ys, xs = zip(*cells)
+        grid[list(ys), list(xs)] = 1
+    return grid
+
+def maze_key(size, walls):
+    rows, cols = size
+    digest = hashlib.sha256(f'{rows}x{cols}:'.encode())
+    digest.update(np.packbits(wall_grid(size, walls)).tobytes())
+    return digest.hexdigest()
+
+"""
+========= Step 3 =========
+Define the ArtifactStore class
+"""
+class ArtifactStore:
+    def __init__(self, root=DEFAULT_ROOT, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        # the bytes in the store as far as this store knows, None until the first scan
+        self.used = None
+        self.lock = threading.Lock()
+
+    ''' Define a function to get the file of an artifact, spread over 256 directories'''
+    def _path(self, key, name):
+        return os.path.join(self.root, key[:2], f'{key}.{name}.npy')
+
+    ''' Define a function to map an artifact read-only, or return None when it is not stored'''
+    def get(self, key, name):
+        path = self._path(key, name)
+        try:
+            array = np.load(path, mmap_mode='r')
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            # an empty array cannot be mapped, so it is read instead
+            array = np.load(path)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return array
+
+    ''' Define a function to store an artifact and return it mapped from the store'''
+    def put(self, key, name, array):
+        path = self._path(key, name)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # a name of its own for every write, so concurrent writers never share a temporary file
+        descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=f'{key}.{name}.', suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                np.save(file, np.asarray(array))
+            os.chmod(temporary, 0o644)
+            written = os.path.getsize(temporary)
+            existed = os.path.exists(path)
+            try:
+                os.replace(temporary, path)
+            except OSError:
+                # the rename lost a race with another writer (a mapped file cannot be replaced on Windows),
+                # which stored the same artifact, so its file is kept
+                if not os.path.exists(path):
+                    raise
+                existed = True
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+        with self.lock:
+            if self.used is None:
+                self.used = self.size()
+            elif not existed:
+                self.used += written
+            over = self.used > self.max_bytes
+        if over:
+            self.evict()
+        stored = self.get(key, name)
+        # the eviction may already have removed a single artifact larger than the cap
+        return stored if stored is not None else np.asarray(array)
+
+    ''' Define a function to get an artifact, computing and storing it the first time'''
+    def get_or_compute(self, key, name, compute):
+        array = self.get(key, name)
+        if array is None:
+            array = self.put(key, name, compute())
+        return array
+
+    ''' Define a function to list the stored files as (last use, size, path)'''
+    def _files(self):
+        files = []
+        for directory in os.scandir(self.root):
+            if not directory.is_dir():
+                continue
+            for entry in os.scandir(directory.path):
+                if not entry.name.endswith('.npy'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    ''' Define a function to remove the least recently used files until the store fits EVICT_TO of its cap'''
+    def evict(self):
+        # the scan also brings the running count back in line with the writes of the other processes
+        files = self._files()
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes * EVICT_TO:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        with self.lock:
+            self.used = total
+        return total
+
+    def size(self):
+        return sum(size for _, size, _ in self._files())
@@ -0,0 +1,101 @@
+'''
+Choice of the engine used by the "auto" algorithm.
+Every engine (BFS, or A* on the grid or on the reduced graph) reaches the goals
+one leg at a time, each leg being a shortest path to the nearest remaining goal.
+BFS stops at the nearest goal by nature, and A* is run with multi_target when
+there are several goals, so that it searches for all the remaining goals at once
+instead of the one nearest by Manhattan distance. So every engine returns a path
+of the same length, and the engines are chosen by speed alone, with one exception:
+with several goals, when two or more remaining goals are equally near at the end
+of a leg, each engine may go to a different one of them, and the later legs and
+the total length of the path can then differ from another engine's. The speed
+depends on the shape of the maze, which is described by a few cheap features:
++ cells: the number of cells of the grid
++ wall_density: the share of the cells which are walls
++ goals: the number of goals
++ corridor_ratio: the share of the open cells which have exactly two open neighbours
+
+calibrate_auto.py times every engine on generated mazes and writes the features
+and the fastest engine of each maze to auto_calibration.json. A maze is then given
+the engine of the calibration maze nearest to it in feature space.
+'''
+
+'''
+========= Step 1 =========
+Import necessary libraries
+'''
+import json
+import math
+import os
+import numpy as np
+from artifact_store import wall_grid
+
+CALIBRATION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'auto_calibration.json')
+
+# name -> (algorithm, options); multi_target is added by engine_settings
+ENGINES = {
+    'bfs': ('bfs', {'reduced': False, 'queue': 'heap'}),
+    'as': ('as', {'reduced': False, 'queue': 'heap'}),
+    'as-reduced': ('as', {'reduced': True, 'queue': 'heap'})
+}
+
+# the engine used when there is no calibration
+DEFAULT_ENGINE = 'as'
+
+''' Define a function to get the algorithm and the options of an engine for a maze with this number of goals'''
+def engine_settings(name, num_goals):
+    algorithm, options = ENGINES[name]
+    return algorithm, dict(options, multi_target=num_goals > 1)
+
+"""
+========= Step 2 =========
+Define the features of a maze
+"""
+def maze_features(size, walls, goals):
+    rows, cols = size
+    grid = wall_grid(size, walls)
+    open_grid = np.pad(grid == 0, 1)
+    neighbours = (open_grid[:-2, 1:-1].astype(np.int8) + open_grid[2:, 1:-1] + open_grid[1:-1, :-2] + open_grid[1:-1, 2:])
+    open_cells = int(open_grid.sum())
+    corridors = int(((neighbours == 2) & open_grid[1:-1, 1:-1]).sum())
+    return {
+        'cells': rows * cols,
+        'wall_density': 1 - open_cells / (rows * cols) if rows * cols else 0.0,
+        'goals': len(goals),
+        'corridor_ratio': corridors / open_cells if open_cells else 0.0
+    }
+
+''' Define a function to place the features on comparable scales, the size on a log scale'''
+def _scaled(features):
+    return (
+        math.log2(max(features['cells'], 1)) / 4,
+        features['wall_density'],
+        math.log2(max(features['goals'], 1)) / 2,
+        features['corridor_ratio']
+    )
+
+"""
+========= Step 3 =========
+Define the choice of the engine
+"""
+_calibration = None
+
+def load_calibration(path=CALIBRATION_FILE):
+    global _calibration
+    if _calibration is None:
+        try:
+            with open(path) as file:
+                samples = json.load(file)['samples']
+            _calibration = [(_scaled(sample['features']), sample['best']) for sample in samples if sample['best'] in ENGINES]
+        except FileNotFoundError:
+            _calibration = []
+    return _calibration
+
+''' Define a function to return the name of the engine for a maze with these features'''
+def choose_engine(features, calibration=None):
+    samples = load_calibration() if calibration is None else calibration
+    if not samples:
+        return DEFAULT_ENGINE
+    point = _scaled(features)
+    _, best = min(samples, key=lambda sample: math.dist(sample[0], point))
+    return best
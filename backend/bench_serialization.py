@@ -0,0 +1,88 @@
+'''
+Benchmark of the share of the /solve latency which goes to building the response.
+For every maze size it solves a generated maze, then encodes the result:
++ through the MazeResponse model, validated field by field and dumped with json (the former path)
++ through encode_response, which trusts the solver output and encodes it with orjson (the current path)
+
+Usage: python bench_serialization.py --sizes 50,100,200 --algorithm bfs
+'''
+
+'''
+========= Step 1 =========
+Import necessary libraries
+'''
+import argparse
+import json
+import time
+from maze import Maze
+from maze_generator import generate_maze
+from server import MazeResponse, convert_maze_to_size_and_walls, encode_response
+
+"""
+========= Step 2 =========
+Define the two ways of building the response
+"""
+def encode_with_model(success, algorithm, maze_instance):
+    response = MazeResponse(
+        success=success,
+        algorithm=algorithm,
+        solution_single=maze_instance.solution_single,
+        solution_multiple=maze_instance.solution_multiple,
+        time_taken=maze_instance.time_taken,
+        nodes_explored_single=maze_instance.nodes_explored_single,
+        nodes_explored_multiple=maze_instance.nodes_explored_multiple,
+        num_explored_multiple=maze_instance.num_explored_multiple,
+        num_explored_single=maze_instance.num_explored_single,
+        path_length_single=maze_instance.path_length_single,
+        path_length_multiple=maze_instance.path_length_multiple,
+        max_frontier_size=maze_instance.max_frontier_size,
+        budget_exceeded=maze_instance.budget_exceeded
+    )
+    # FastAPI validates the returned model once more against the response_model before dumping it
+    response = MazeResponse.model_validate(response.model_dump())
+    return json.dumps(response.model_dump(mode='json')).encode()
+
+def best_of(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start_time)
+    return best, result
+
+"""
+========= Step 3 =========
+Time the solve and both encodings for every size
+"""
+def main():
+    parser = argparse.ArgumentParser(description='Measure the serialization share of the /solve latency.')
+    parser.add_argument('--sizes', default='50,100,200,400')
+    parser.add_argument('--algorithm', default='bfs', choices=['bfs', 'dfs', 'gbfs', 'as'])
+    parser.add_argument('--method', default='random', help='the maze_generator method')
+    parser.add_argument('--goals', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'size':>6}{'explored':>10}{'KB':>9}{'solve ms':>10}{'model ms':>10}{'share':>8}{'orjson ms':>11}{'share':>8}")
+    for size in map(int, args.sizes.split(',')):
+        grid, start, goals = generate_maze(args.method, size, size, args.goals, seed=args.seed)
+        maze_size, walls = convert_maze_to_size_and_walls(grid.tolist())
+
+        def solve():
+            maze_instance = Maze(maze_size, start, goals, walls)
+            if args.algorithm in ['bfs', 'dfs']:
+                return maze_instance.solve_bfs_dfs(algorithm=args.algorithm), maze_instance
+            return maze_instance.solve_gbfs_as(algorithm=args.algorithm), maze_instance
+
+        solve_time, (success, maze_instance) = best_of(solve, args.repeat)
+        model_time, model_body = best_of(lambda: encode_with_model(success, args.algorithm, maze_instance), args.repeat)
+        fast_time, fast_body = best_of(lambda: encode_response(success, args.algorithm, maze_instance), args.repeat)
+        assert json.loads(model_body) == json.loads(fast_body)
+
+        print(f"{size:>6}{maze_instance.num_explored_multiple:>10}{len(fast_body) / 1024:>9.0f}{solve_time * 1000:>10.1f}"
+              f"{model_time * 1000:>10.1f}{model_time / (solve_time + model_time):>8.0%}"
+              f"{fast_time * 1000:>11.1f}{fast_time / (solve_time + fast_time):>8.0%}")
+
+if __name__ == '__main__':
+    main()
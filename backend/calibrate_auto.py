@@ -0,0 +1,78 @@
+'''
+Calibration of the "auto" algorithm.
+It generates mazes of every maze_generator method, size and number of goals,
+times every engine of auto_select.ENGINES on each of them (building the maze,
+and the reduced graph when the engine uses it, is part of the time) and writes
+the features, the times and the fastest engine of every maze to
+auto_calibration.json, which auto_select reads.
+
+Usage: python calibrate_auto.py --sizes 20,50,100,200 --goals 1,3 --seeds 2
+'''
+
+'''
+========= Step 1 =========
+Import necessary libraries
+'''
+import argparse
+import json
+import time
+from auto_select import CALIBRATION_FILE, ENGINES, engine_settings, maze_features
+from maze import Maze
+from maze_generator import METHODS, generate_maze
+from server import convert_maze_to_size_and_walls
+
+"""
+========= Step 2 =========
+Define the timing of one engine on one maze
+"""
+def time_engine(name, size, start, goals, walls, repeat):
+    algorithm, options = engine_settings(name, len(goals))
+    best = float('inf')
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        maze = Maze(size, start, goals, walls, reduced=options['reduced'])
+        if algorithm == 'bfs':
+            maze.solve_bfs_dfs(algorithm='bfs')
+        else:
+            maze.solve_gbfs_as(algorithm=algorithm, queue=options['queue'], multi_target=options['multi_target'])
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+"""
+========= Step 3 =========
+Time every engine on every generated maze and keep the fastest
+"""
+def main():
+    parser = argparse.ArgumentParser(description='Time the engines of the auto algorithm on generated mazes.')
+    parser.add_argument('--sizes', default='20,50,100,200')
+    parser.add_argument('--goals', default='1,3')
+    parser.add_argument('--methods', default=','.join(METHODS))
+    parser.add_argument('--seeds', type=int, default=2, help='the number of mazes per method, size and number of goals')
+    parser.add_argument('--repeat', type=int, default=2)
+    parser.add_argument('--output', default=CALIBRATION_FILE)
+    args = parser.parse_args()
+
+    samples = []
+    for method in args.methods.split(','):
+        for size in map(int, args.sizes.split(',')):
+            for num_goals in map(int, args.goals.split(',')):
+                for seed in range(args.seeds):
+                    grid, start, goals = generate_maze(method, size, size, num_goals, seed=seed)
+                    maze_size, walls = convert_maze_to_size_and_walls(grid.tolist())
+                    times = {name: time_engine(name, maze_size, start, goals, walls, args.repeat) for name in ENGINES}
+                    best = min(times, key=times.get)
+                    samples.append({
+                        'method': method,
+                        'features': maze_features(maze_size, walls, goals),
+                        'times': times,
+                        'best': best
+                    })
+                    print(f"{method:<12}{size:>5}x{size:<5}{num_goals:>3} goals  best {best:<18}"
+                          + ' '.join(f'{name} {seconds * 1000:.1f}ms' for name, seconds in times.items()))
+
+    with open(args.output, 'w') as file:
+        json.dump({'engines': list(ENGINES), 'samples': samples}, file, indent=1)
+    print(f"Wrote {len(samples)} samples to {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+'''
+Connected components of the open cells of a maze.
+Two open cells get the same label when a path of open cells joins them, so a goal
+whose label differs from the label of the start can never be reached, whatever
+the algorithm. The solvers check this before every leg and stop at once instead
+of exploring the whole region of the start.
+
+The labels are found by a flood fill from every open cell not labelled yet, which
+visits every cell once. The grid is padded with a border of walls and flattened,
+so the four neighbours of a cell are just the offsets -1, +1, -width and +width.
+'''
+
+'''
+========= Step 1 =========
+Import necessary libraries
+'''
+import numpy as np
+from artifact_store import wall_grid
+
+"""
+========= Step 2 =========
+Define the labelling of the components
+"""
+def label_components(size, walls):
+    # return an int32 grid indexed [y][x] with the component of every open cell, and -1 for the walls
+    rows, cols = size
+    width = cols + 2
+    open_grid = np.zeros((rows + 2, width), dtype=bool)
+    open_grid[1:-1, 1:-1] = wall_grid(size, walls) == 0
+    unlabelled = bytearray(open_grid.ravel().tobytes())
+    labels = np.full((rows + 2) * width, -1, dtype=np.int32)
+    offsets = (-width, -1, width, 1)
+
+    label = 0
+    for seed in np.flatnonzero(open_grid).tolist():
+        if not unlabelled[seed]:
+            continue
+        unlabelled[seed] = 0
+        stack = [seed]
+        region = []
+        while stack:
+            cell = stack.pop()
+            region.append(cell)
+            for offset in offsets:
+                next_cell = cell + offset
+                if unlabelled[next_cell]:
+                    unlabelled[next_cell] = 0
+                    stack.append(next_cell)
+        labels[region] = label
+        label += 1
+
+    return labels.reshape(rows + 2, width)[1:-1, 1:-1].copy()
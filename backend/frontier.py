@@ -13,6 +13,7 @@ The frontier class will have some built-in function, including:
 + isEmpty(): to check whether the frontier is empty or not -> later be
 used to get the result of the search.
 + add(): to add node into frontier
++ len(): to get the number of nodes in the frontier
 + contain_state(): to check whether the frontier contain the goal or not
 + remove(): this will be an abstract function, depending on the type of 
 search.
@@ -23,6 +24,9 @@ class Frontier:
 
     def isEmpty(self):
         return len(self.frontier) == 0
+
+    def __len__(self):
+        return len(self.frontier)
     
     def add(self, node):
         self.frontier.append(node)
@@ -84,3 +88,92 @@ class PriorityQueue(Frontier):
             node = heapq.heappop(self.frontier)
             return node
     
+
+#-----------------------------BUCKET QUEUE-----------------------------#
+"""
+Every step in the maze has an integer cost and the Manhattan distance is an integer,
+so the total cost f = g + h of every node is a small integer. Instead of a heap, the
+BucketQueue keeps one bucket per value of f (Dial's algorithm) and inside it one
+stack per value of g:
++ remove() takes a node from the bucket with the lowest f, and between the nodes
+with the same f it prefers the one with the largest g (the deepest one), which is
+closer to the goal.
++ The lowest f is a cursor which only moves up while A* runs (f never decreases
+along a path with a consistent heuristic), so an empty bucket is left by stepping
+the cursor to the next f present. A node added below the cursor (as in GBFS, where
+f = h) moves it back down.
++ The values of g present in a bucket are kept in a small heap, so the largest one
+is found without looking at the values of g in between.
++ contain_state() is answered from a count of the states in the queue.
+"""
+class BucketQueue(Frontier):
+    def __init__(self):
+        super().__init__()
+        self.buckets = {} # buckets[f][g] is the stack of nodes with that f and g
+        self.depths = {} # depths[f] is a heap of -g for the values of g in buckets[f]
+        self.counts = {} # counts[f] is the number of nodes in buckets[f]
+        self.states = {} # states[state] is the number of nodes with that state
+        self.size = 0
+        self.min_f = None
+        self.max_f = None
+
+    def isEmpty(self):
+        return self.size == 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, node):
+        g = node.cost
+        f = g + node.heuristic
+        bucket = self.buckets.get(f)
+        if bucket is None:
+            bucket = self.buckets[f] = {}
+            self.depths[f] = []
+            self.counts[f] = 0
+        stack = bucket.get(g)
+        if stack is None:
+            stack = bucket[g] = []
+            heapq.heappush(self.depths[f], -g)
+        stack.append(node)
+        self.counts[f] += 1
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+        self.size += 1
+        if self.min_f is None or f < self.min_f:
+            self.min_f = f
+        if self.max_f is None or f > self.max_f:
+            self.max_f = f
+
+    def contain_state(self, state):
+        return state in self.states
+
+    def remove(self):
+        if self.isEmpty():
+            raise Exception('The Bucket Queue is currently empty!!!')
+        else:
+            f = self.min_f
+            bucket = self.buckets[f]
+            depths = self.depths[f]
+            g = -depths[0]
+            stack = bucket[g]
+            node = stack.pop()
+            if not stack:
+                del bucket[g]
+                heapq.heappop(depths)
+            self.size -= 1
+
+            self.states[node.state] -= 1
+            if self.states[node.state] == 0:
+                del self.states[node.state]
+
+            # move the cursor on to the next f present once this bucket is empty
+            self.counts[f] -= 1
+            if self.counts[f] == 0:
+                del self.buckets[f], self.depths[f], self.counts[f]
+                if self.size == 0:
+                    self.min_f = self.max_f = None
+                else:
+                    while f not in self.buckets:
+                        f += 1
+                    self.min_f = f
+            return node
@@ -0,0 +1,283 @@
+'''
+Hierarchical pathfinding (HPA*) abstraction of a maze.
+The grid is partitioned into square clusters of cluster_size x cluster_size cells:
++ Entrances: along the border between two adjacent clusters, every maximal run of
+cells which are open on both sides is an entrance. Short runs get one transition in
+the middle, long runs get one transition at each end. The two cells of a transition
+become abstract nodes, linked by an inter-edge of cost 1.
++ Intra-edges: inside every cluster, the abstract nodes are linked together with the
+length of the shortest path between them that stays inside the cluster.
+
+This is computed once per maze and only the clusters around a changed cell are
+recomputed when a wall is added or removed. The abstractions are also kept in a
+small LRU cache of the process, keyed by the hash of the grid, so the server (which
+builds a new Maze for every request) only builds the abstraction of a maze once.
+A query then inserts the start and the goal into the abstract graph, searches it
+with A*, and refines every abstract edge back into cells.
+'''
+
+'''
+========= Step 1 =========
+Import necessary libraries
+'''
+import copy
+import os
+import threading
+from collections import OrderedDict
+from frontier import Queue, PriorityQueue
+from utils import manhattan_distance, check_deadline
+from node import Node
+
+MOVES = [(0, -1), (-1, 0), (0, 1), (1, 0)]
+
+# an entrance longer than this gets a transition at both ends instead of one in the middle
+MAX_SINGLE_ENTRANCE = 6
+
+# the number of abstractions kept by the cache of the process
+ABSTRACTION_CACHE_SIZE = int(os.environ.get('MAZE_ABSTRACTION_CACHE', '8'))
+
+"""
+========= Step 2 =========
+Define the ClusterAbstraction class
+"""
+class ClusterAbstraction:
+    def __init__(self, size, walls, cluster_size=10, deadline=None):
+        self.size = size # size is a tuple (rows, columns)
+        # the walls the abstraction was built on. A cached abstraction holds its own frozenset copy, never the set of a maze;
+        # Maze.set_wall detaches a copy onto the maze's walls before it calls update()
+        self.walls = walls
+        self.cluster_size = cluster_size
+
+        rows, cols = size
+        self.clusters_x = (cols + cluster_size - 1) // cluster_size
+        self.clusters_y = (rows + cluster_size - 1) // cluster_size
+
+        # transitions[(cluster, other_cluster)] = list of (cell, other_cell) pairs crossing that border
+        self.transitions = {}
+        # edges[cell] = {other_cell: (cost, path)} where path excludes cell and includes other_cell
+        self.edges = {}
+
+        # the build is checked against the deadline of the search after every cluster
+        for cy in range(self.clusters_y):
+            for cx in range(self.clusters_x):
+                check_deadline(deadline)
+                if cx + 1 < self.clusters_x:
+                    self._build_border((cx, cy), (cx + 1, cy))
+                if cy + 1 < self.clusters_y:
+                    self._build_border((cx, cy), (cx, cy + 1))
+        for cy in range(self.clusters_y):
+            for cx in range(self.clusters_x):
+                check_deadline(deadline)
+                self._build_intra_edges((cx, cy))
+
+    ''' Define some helper functions for the clusters'''
+    def cluster_of(self, cell):
+        return (cell[0] // self.cluster_size, cell[1] // self.cluster_size)
+
+    def _is_open(self, cell):
+        x, y = cell
+        return 0 <= x < self.size[1] and 0 <= y < self.size[0] and cell not in self.walls
+
+    def _neighbour_clusters(self, cluster):
+        cx, cy = cluster
+        neighbours = []
+        for dx, dy in MOVES:
+            if 0 <= cx + dx < self.clusters_x and 0 <= cy + dy < self.clusters_y:
+                neighbours.append((cx + dx, cy + dy))
+        return neighbours
+
+    def _cluster_nodes(self, cluster):
+        nodes = []
+        for other in self._neighbour_clusters(cluster):
+            for cell, other_cell in self.transitions.get((cluster, other), []):
+                if cell not in nodes:
+                    nodes.append(cell)
+        return nodes
+
+    ''' Define a function to find the entrances along the border between two adjacent clusters'''
+    def _build_border(self, cluster, other):
+        k = self.cluster_size
+        (cx, cy), (ox, oy) = cluster, other
+        if ox > cx:
+            # vertical border: cluster on the left, other on the right
+            pairs = [((ox * k - 1, y), (ox * k, y)) for y in range(cy * k, min((cy + 1) * k, self.size[0]))]
+        else:
+            # horizontal border: cluster on top, other at the bottom
+            pairs = [((x, oy * k - 1), (x, oy * k)) for x in range(cx * k, min((cx + 1) * k, self.size[1]))]
+
+        transitions = []
+        run = []
+        for cell, other_cell in pairs + [(None, None)]:
+            if cell is not None and self._is_open(cell) and self._is_open(other_cell):
+                run.append((cell, other_cell))
+                continue
+            if len(run) >= MAX_SINGLE_ENTRANCE:
+                transitions.extend([run[0], run[-1]])
+            elif run:
+                transitions.append(run[len(run) // 2])
+            run = []
+
+        self.transitions[(cluster, other)] = transitions
+        self.transitions[(other, cluster)] = [(other_cell, cell) for cell, other_cell in transitions]
+
+    ''' Define a function to search inside a single cluster from a cell'''
+    def _local_search(self, cell, cluster):
+        # breadth first search restricted to the cells of the cluster, returning the parent of every reached cell
+        frontier = Queue()
+        frontier.add(Node(state=cell, parent=None, action=None))
+        reached = {cell: None}
+        explored = []
+        while not frontier.isEmpty():
+            node = frontier.remove()
+            explored.append(node.state)
+            x, y = node.state
+            for dx, dy in MOVES:
+                next_cell = (x + dx, y + dy)
+                if next_cell not in reached and self._is_open(next_cell) and self.cluster_of(next_cell) == cluster:
+                    reached[next_cell] = node.state
+                    frontier.add(Node(state=next_cell, parent=node, action=None))
+        return reached, explored
+
+    def _path_to(self, reached, cell):
+        path = []
+        while reached[cell] is not None:
+            path.append(cell)
+            cell = reached[cell]
+        path.reverse()
+        return path
+
+    ''' Define a function to link all the abstract nodes of a cluster together'''
+    def _build_intra_edges(self, cluster):
+        nodes = self._cluster_nodes(cluster)
+        for cell in nodes:
+            self.edges[cell] = {}
+            # inter-edges to the other side of every transition starting from this cell
+            for other in self._neighbour_clusters(cluster):
+                for start, other_cell in self.transitions.get((cluster, other), []):
+                    if start == cell:
+                        self.edges[cell][other_cell] = (1, [other_cell])
+
+            reached, _ = self._local_search(cell, cluster)
+            for other_cell in nodes:
+                if other_cell != cell and other_cell in reached:
+                    path = self._path_to(reached, other_cell)
+                    self.edges[cell][other_cell] = (len(path), path)
+
+    ''' Define a function to update the abstraction locally after a cell became a wall or an open cell'''
+    def update(self, cell):
+        cluster = self.cluster_of(cell)
+        neighbours = self._neighbour_clusters(cluster)
+
+        # forget the abstract nodes of the cluster and of its neighbours, they are all rebuilt below
+        for affected in [cluster] + neighbours:
+            for node in self._cluster_nodes(affected):
+                self.edges.pop(node, None)
+
+        for other in neighbours:
+            if other < cluster:
+                self._build_border(other, cluster)
+            else:
+                self._build_border(cluster, other)
+
+        for affected in [cluster] + neighbours:
+            self._build_intra_edges(affected)
+
+    ''' Define a function to copy the abstraction for a maze whose walls are about to change, leaving the cached one as it is'''
+    def detach(self, walls):
+        # update() replaces the entries of the clusters it rebuilds instead of changing them, so copying the outer dicts is enough
+        other = copy.copy(self)
+        other.walls = walls
+        other.transitions = dict(self.transitions)
+        other.edges = dict(self.edges)
+        return other
+
+    ''' Define a function to answer a query from start to goal, returning the path of cells and the explored cells'''
+    def find_path(self, start, goal, deadline=None):
+        explored = []
+        start_cluster, goal_cluster = self.cluster_of(start), self.cluster_of(goal)
+
+        # a goal inside the same cluster is first searched for locally
+        reached, local_explored = self._local_search(start, start_cluster)
+        explored.extend(local_explored)
+        if start_cluster == goal_cluster and goal in reached:
+            return self._path_to(reached, goal), explored
+
+        # insert the start and the goal into the abstract graph as temporary nodes
+        start_edges = dict(self.edges.get(start, {}))
+        for node in self._cluster_nodes(start_cluster):
+            if node != start and node in reached:
+                path = self._path_to(reached, node)
+                start_edges[node] = (len(path), path)
+
+        goal_reached, goal_explored = self._local_search(goal, goal_cluster)
+        explored.extend(goal_explored)
+        goal_edges = {}
+        for node in self._cluster_nodes(goal_cluster):
+            if node != goal and node in goal_reached:
+                path = self._path_to(goal_reached, node)
+                path.reverse()
+                # the path from the node back to the goal, excluding the node and including the goal
+                goal_edges[node] = (len(path), path[1:] + [goal])
+
+        # search the abstract graph with A*
+        frontier = PriorityQueue()
+        frontier.add(Node(state=start, parent=None, action=[], cost=0, heuristic=manhattan_distance(start, goal)))
+        closed = set()
+        while not frontier.isEmpty():
+            node = frontier.remove()
+            if node.state in closed:
+                continue
+            closed.add(node.state)
+            explored.append(node.state)
+            check_deadline(deadline)
+
+            if node.state == goal:
+                return self._refine(node), explored
+
+            neighbours = start_edges if node.state == start else self.edges.get(node.state, {})
+            if node.state in goal_edges:
+                neighbours = dict(neighbours)
+                neighbours[goal] = goal_edges[node.state]
+            for next_state, (cost, path) in neighbours.items():
+                if next_state not in closed:
+                    child = Node(state=next_state, parent=node, action=path, cost=node.cost + cost,
+                                 heuristic=manhattan_distance(next_state, goal))
+                    frontier.add(child)
+
+        return None, explored
+
+    ''' Define a function to refine an abstract path back into cells'''
+    def _refine(self, node):
+        segments = []
+        while node.parent is not None:
+            segments.append(node.action)
+            node = node.parent
+        cells = []
+        for segment in reversed(segments):
+            cells.extend(segment)
+        return cells
+
+"""
+========= Step 3 =========
+Define the cache of the abstractions of the process, shared by every Maze of the same grid
+"""
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def cached_abstraction(key, size, walls, cluster_size=10, deadline=None):
+    # key is the maze_key of the grid; the cached abstraction keeps its own copy of the walls,
+    # and a build stopped by the deadline raises DeadlineExceeded before anything is cached
+    cache_key = (key, cluster_size)
+    with _cache_lock:
+        abstraction = _cache.get(cache_key)
+        if abstraction is not None:
+            _cache.move_to_end(cache_key)
+            return abstraction
+    # built outside the lock, so the queries on other mazes are not held up meanwhile
+    abstraction = ClusterAbstraction(size, frozenset(walls), cluster_size, deadline)
+    with _cache_lock:
+        _cache[cache_key] = abstraction
+        _cache.move_to_end(cache_key)
+        while len(_cache) > ABSTRACTION_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return abstraction
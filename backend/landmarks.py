@@ -0,0 +1,114 @@
+'''
+Landmark distance tables for the ALT heuristic of GBFS and A*.
+A few open cells are chosen as landmarks, and the length of the shortest path from
+every landmark to every cell is computed once per maze. For any two cells n and g
+and any landmark L, the triangle inequality gives
+
+    distance(n, g) >= |distance(L, n) - distance(L, g)|
+
+so the largest of these bounds (and of the Manhattan distance) is an admissible and
+consistent heuristic, much closer to the real distance than the Manhattan distance
+alone in a maze full of walls. It holds on the reduced graph too, whose corridors are
+never shorter than the grid distance between their ends.
+
++ The landmarks are chosen by farthest point: the first one is the cell farthest
+from an open cell, and every next one the cell farthest from all the landmarks
+chosen so far, so they sit at the ends of the maze.
++ The table is an int32 array (landmarks, rows, cols), -1 where a landmark cannot
+reach the cell. It only depends on the grid, so it is kept in the ArtifactStore and
+shared by every process which solves the same maze.
++ The landmarks are all in the component of the first open cell, so in the other
+components the heuristic is the Manhattan distance.
+'''
+
+'''
+========= Step 1 =========
+Import necessary libraries
+'''
+from collections import deque
+import numpy as np
+from artifact_store import wall_grid
+from utils import manhattan_distance, check_deadline
+
+# the number of landmarks of a maze
+LANDMARKS = 4
+
+"""
+========= Step 2 =========
+Define the distances from a cell, by a breadth first search on the padded and flattened grid
+"""
+def _distances(open_cells, width, source, deadline=None):
+    distances = np.full(len(open_cells), -1, dtype=np.int32)
+    reached = bytearray(len(open_cells))
+    reached[source] = 1
+    order = [source]
+    depths = [0]
+    queue = deque([(source, 0)])
+    offsets = (-width, -1, width, 1)
+    while queue:
+        # every cell is taken out of the queue once, so this counts the cells searched
+        if (len(order) - len(queue)) % 65536 == 0:
+            check_deadline(deadline)
+        cell, depth = queue.popleft()
+        for offset in offsets:
+            next_cell = cell + offset
+            if open_cells[next_cell] and not reached[next_cell]:
+                reached[next_cell] = 1
+                order.append(next_cell)
+                depths.append(depth + 1)
+                queue.append((next_cell, depth + 1))
+    distances[order] = depths
+    return distances
+
+"""
+========= Step 3 =========
+Define the table of the distances from the landmarks
+"""
+def landmark_table(size, walls, count=LANDMARKS, deadline=None):
+    # return an int32 array (count, rows, cols) with the distance from every landmark to every cell, -1 when unreachable;
+    # the searches check the deadline of the search which needs the table, and raise DeadlineExceeded once it has passed
+    rows, cols = size
+    width = cols + 2
+    open_grid = np.zeros((rows + 2, width), dtype=bool)
+    open_grid[1:-1, 1:-1] = wall_grid(size, walls) == 0
+    open_cells = bytearray(open_grid.ravel().tobytes())
+    table = np.full((count, (rows + 2) * width), -1, dtype=np.int32)
+
+    seeds = np.flatnonzero(open_grid)
+    if len(seeds):
+        # the distance from each cell to its nearest landmark, the next landmark being the farthest cell
+        nearest = _distances(open_cells, width, int(seeds[0]), deadline)
+        for index in range(count):
+            landmark = int(np.argmax(nearest))
+            if nearest[landmark] <= 0:
+                # no cell is left away from the landmarks, as in a component of a single cell
+                break
+            table[index] = _distances(open_cells, width, landmark, deadline)
+            nearest = table[index] if index == 0 else np.minimum(nearest, table[index])
+
+    return table.reshape(count, rows + 2, width)[:, 1:-1, 1:-1].copy()
+
+"""
+========= Step 4 =========
+Define the heuristic to the nearest of some targets
+"""
+def landmark_heuristic(table, size, targets):
+    # the tables are read one cell at a time, so they are kept as flat rows of the (possibly mapped) array
+    cols = size[1]
+    rows = [row for row in np.asarray(table).reshape(len(table), -1)]
+    target_distances = [(target, [int(row[target[1] * cols + target[0]]) for row in rows]) for target in targets]
+
+    def heuristic(state):
+        index = state[1] * cols + state[0]
+        distances = [int(row[index]) for row in rows]
+        best = None
+        for target, from_landmarks in target_distances:
+            bound = manhattan_distance(state, target)
+            for distance, target_distance in zip(distances, from_landmarks):
+                if distance >= 0 and target_distance >= 0 and abs(distance - target_distance) > bound:
+                    bound = abs(distance - target_distance)
+            if best is None or bound < best:
+                best = bound
+        return best
+
+    return heuristic
@@ -0,0 +1,384 @@
+'''
+Local load-testing harness for the FastAPI solve server.
+It replays a seeded mix of generated mazes (sizes x maze methods x algorithms)
+against the /solve endpoint and reports the throughput, the p50/p95/p99 latency,
+the error rate and the request/response payload sizes, overall and per
+algorithm and size. The target can be:
++ the app in this process, called directly through ASGI (the default)
++ a server already running somewhere (--url http://localhost:5000)
++ a server started here with uvicorn (--spawn, with --workers N)
+
+The load is either a number of concurrent clients which send their next request
+as soon as the previous one is answered (--concurrency), or a fixed rate of
+requests per second whatever the answers (--rate).
+
+The workload replays a small set of mazes, and the server answers a request it has
+already solved from its result cache, which persists across runs. Every sample
+records whether it was a cache hit (the X-Cache header), and the report gives the
+hits and the misses as separate rows. With --cache, a server started here (in
+process or with --spawn) uses the shared cache of the host (shared), a new empty
+one (fresh), or none at all (off), which measures the uncached solves only.
+
+Usage: python loadtest.py --sizes 20,50,100 --algorithms bfs,as --concurrency 8 --duration 20
+'''
+
+'''
+========= Step 1 =========
+Import necessary libraries
+'''
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+from maze_generator import generate_maze, request_bytes
+
+"""
+========= Step 2 =========
+Define the transports, which all send a JSON body to a path and return the
+status code, the headers (with lower case names) and the body of the response
+"""
+class ASGITransport:
+    def __init__(self, app):
+        self.app = app
+
+    async def post(self, path, body):
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'POST',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+            'client': ('127.0.0.1', 0),
+            'server': ('127.0.0.1', 80)
+        }
+        response_done = asyncio.Event()
+        request_sent = False
+        status = None
+        headers = {}
+        chunks = []
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            # the client only disconnects once the whole response has been sent
+            await response_done.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                headers.update((name.decode('latin-1').lower(), value.decode('latin-1')) for name, value in message.get('headers', []))
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+                if not message.get('more_body', False):
+                    response_done.set()
+
+        await self.app(scope, receive, send)
+        return status, headers, b''.join(chunks)
+
+    async def close(self):
+        pass
+
+class HTTPTransport:
+    # a minimal HTTP/1.1 client on asyncio streams, keeping a pool of keep-alive connections
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.idle = []
+
+    async def post(self, path, body):
+        if self.idle:
+            reader, writer = self.idle.pop()
+        else:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            head = (f'POST {self.prefix}{path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n'
+                    f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n')
+            writer.write(head.encode() + body)
+            await writer.drain()
+            status, headers, response = await self._read_response(reader)
+        except Exception:
+            writer.close()
+            raise
+        if headers.get('connection', '').lower() != 'close':
+            self.idle.append((reader, writer))
+        else:
+            writer.close()
+        return status, headers, response
+
+    async def _read_response(self, reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError('The server closed the connection')
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            body = b''.join(chunks)
+        else:
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+        return status, headers, body
+
+    async def close(self):
+        for _, writer in self.idle:
+            writer.close()
+        self.idle = []
+
+"""
+========= Step 3 =========
+Define the workload: every job is one request body with the labels used in the report
+"""
+def build_workload(sizes, methods, algorithms, mazes_per_case, goals, seed, depth_limit):
+    jobs = []
+    for size in sizes:
+        for method in methods:
+            for index in range(mazes_per_case):
+                grid, start, maze_goals = generate_maze(method, size, size, goals, seed=seed + index)
+                for algorithm in algorithms:
+                    options = {'depth_limit': depth_limit} if depth_limit else {}
+                    body = request_bytes(grid, start, maze_goals, algorithm, **options)
+                    jobs.append({'algorithm': algorithm, 'size': size, 'method': method, 'body': body})
+    return jobs
+
+"""
+========= Step 4 =========
+Define the load generators, which record one sample per request
+"""
+async def send_job(transport, job, samples):
+    start_time = time.perf_counter()
+    try:
+        status, headers, body = await transport.post('/solve', job['body'])
+        error = None if status == 200 else f'HTTP {status}'
+    except Exception as e:
+        status, headers, body, error = None, {}, b'', type(e).__name__
+    samples.append({
+        'algorithm': job['algorithm'],
+        'size': job['size'],
+        'cache': 'hit' if headers.get('x-cache') == 'hit' else 'miss',
+        'latency': time.perf_counter() - start_time,
+        'request_bytes': len(job['body']),
+        'response_bytes': len(body),
+        'error': error
+    })
+
+async def run_closed_loop(transport, jobs, concurrency, duration, total, rng):
+    # every client sends its next request as soon as the previous one is answered
+    samples = []
+    deadline = time.perf_counter() + duration if duration else None
+    sent = 0
+
+    async def client():
+        nonlocal sent
+        while (total is None or sent < total) and (deadline is None or time.perf_counter() < deadline):
+            sent += 1
+            await send_job(transport, rng.choice(jobs), samples)
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return samples
+
+async def run_open_loop(transport, jobs, rate, duration, total, rng):
+    # the requests are sent at a fixed rate, without waiting for the answers
+    samples = []
+    tasks = []
+    start_time = time.perf_counter()
+    sent = 0
+    while (total is None or sent < total) and (duration is None or time.perf_counter() - start_time < duration):
+        tasks.append(asyncio.ensure_future(send_job(transport, rng.choice(jobs), samples)))
+        sent += 1
+        delay = start_time + sent / rate - time.perf_counter()
+        await asyncio.sleep(max(delay, 0))
+    await asyncio.gather(*tasks)
+    return samples
+
+"""
+========= Step 5 =========
+Define the report
+"""
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, int(round(fraction * (len(values) - 1)))))
+    return values[index]
+
+def summarize(samples, elapsed):
+    latencies = [sample['latency'] for sample in samples]
+    errors = [sample for sample in samples if sample['error']]
+    return {
+        'requests': len(samples),
+        'throughput': len(samples) / elapsed if elapsed > 0 else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'error_rate': len(errors) / len(samples) if samples else 0.0,
+        'cache_hits': sum(1 for sample in samples if sample['cache'] == 'hit'),
+        'request_bytes': sum(sample['request_bytes'] for sample in samples) / len(samples) if samples else 0,
+        'response_bytes': sum(sample['response_bytes'] for sample in samples) / len(samples) if samples else 0,
+        'errors': sorted({sample['error'] for sample in errors})
+    }
+
+def print_report(report):
+    columns = f"{'case':<27}{'requests':>9}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}{'req KB':>10}{'resp KB':>10}"
+    print(columns)
+    print('-' * len(columns))
+    for case, summary in report['cases'].items():
+        print(f"{case:<27}{summary['requests']:>9}{summary['throughput']:>9.1f}{summary['p50_ms']:>10.1f}"
+              f"{summary['p95_ms']:>10.1f}{summary['p99_ms']:>10.1f}{summary['error_rate']:>8.1%}"
+              f"{summary['request_bytes'] / 1024:>10.1f}{summary['response_bytes'] / 1024:>10.1f}")
+    overall = report['overall']
+    print(f"Cache hits: {overall['cache_hits']} of {overall['requests']} requests (cache {report['cache']})")
+    if overall['errors']:
+        print(f"Errors: {', '.join(report['overall']['errors'])}")
+
+"""
+========= Step 6 =========
+Define the server started with uvicorn for --spawn
+"""
+def spawn_server(port, workers):
+    backend = os.path.dirname(os.path.abspath(__file__))
+    command = [sys.executable, '-m', 'uvicorn', 'server:app', '--host', '127.0.0.1', '--port', str(port),
+               '--workers', str(workers), '--log-level', 'warning']
+    # the server inherits the environment, and so the result cache chosen by --cache
+    return subprocess.Popen(command, cwd=backend)
+
+def configure_cache(mode):
+    # the result cache of a server started here: the shared one of the host, a new empty one, or none
+    # (a TTL of 0 never returns an entry); set before the server module is imported or spawned
+    if mode in ['fresh', 'off']:
+        os.environ['MAZE_CACHE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='maze-loadtest-'), 'results.sqlite3')
+    if mode == 'off':
+        os.environ['MAZE_CACHE_TTL'] = '0'
+
+async def wait_for_server(url, timeout=30):
+    parts = urlsplit(url)
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            reader, writer = await asyncio.open_connection(parts.hostname, parts.port)
+            writer.write(f'GET /health HTTP/1.1\r\nHost: {parts.hostname}\r\nConnection: close\r\n\r\n'.encode())
+            await writer.drain()
+            status_line = await reader.readline()
+            writer.close()
+            if b' 200 ' in status_line:
+                return
+        except OSError:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError(f'The server at {url} did not start in {timeout}s')
+
+async def run(args):
+    rng = random.Random(args.seed)
+    sizes = [int(size) for size in args.sizes.split(',')]
+    jobs = build_workload(sizes, args.methods.split(','), args.algorithms.split(','), args.mazes, args.goals,
+                          args.seed, args.depth_limit)
+    print(f"Built {len(jobs)} requests ({len(sizes)} sizes x {args.methods} x {args.algorithms})")
+
+    server = None
+    if args.spawn:
+        server = spawn_server(args.port, args.workers)
+        args.url = f'http://127.0.0.1:{args.port}'
+    try:
+        if args.url:
+            await wait_for_server(args.url)
+            transport = HTTPTransport(args.url)
+        else:
+            from server import app
+            transport = ASGITransport(app)
+
+        total = args.requests if args.requests else None
+        duration = args.duration if args.duration or total is None else None
+        start_time = time.perf_counter()
+        if args.rate:
+            samples = await run_open_loop(transport, jobs, args.rate, duration, total, rng)
+        else:
+            samples = await run_closed_loop(transport, jobs, args.concurrency, duration, total, rng)
+        elapsed = time.perf_counter() - start_time
+        await transport.close()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    # the cache hits are answered without solving, so they are reported apart from the misses
+    cases = {}
+    for sample in samples:
+        cases.setdefault(f"{sample['algorithm']} {sample['size']}x{sample['size']} {sample['cache']}", []).append(sample)
+    for sample in samples:
+        cases.setdefault(f"overall {sample['cache']}", []).append(sample)
+    report = {
+        'target': args.url or 'in-process ASGI',
+        'mode': f'rate {args.rate}/s' if args.rate else f'concurrency {args.concurrency}',
+        'cache': args.cache,
+        'elapsed': elapsed,
+        'overall': summarize(samples, elapsed),
+        'cases': {case: summarize(case_samples, elapsed) for case, case_samples in sorted(cases.items(), key=lambda item: (item[0].startswith('overall'), item[0]))}
+    }
+    report['cases']['overall'] = report['overall']
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a mix of mazes against the /solve endpoint.')
+    parser.add_argument('--url', help='the server to target, e.g. http://localhost:5000 (in-process ASGI when not given)')
+    parser.add_argument('--spawn', action='store_true', help='start the server with uvicorn and target it')
+    parser.add_argument('--port', type=int, default=5055, help='the port of the spawned server')
+    parser.add_argument('--workers', type=int, default=1, help='the uvicorn workers of the spawned server')
+    parser.add_argument('--sizes', default='20,50,100', help='the comma separated sizes of the square mazes')
+    parser.add_argument('--methods', default='random,backtracker', help='the comma separated maze_generator methods')
+    parser.add_argument('--algorithms', default='bfs,dfs,as', help='the comma separated algorithms')
+    parser.add_argument('--mazes', type=int, default=3, help='the number of mazes per size and method')
+    parser.add_argument('--goals', type=int, default=2)
+    parser.add_argument('--depth-limit', type=int, default=None)
+    parser.add_argument('--concurrency', type=int, default=8, help='the number of concurrent clients')
+    parser.add_argument('--rate', type=float, default=None, help='send this many requests per second instead')
+    parser.add_argument('--duration', type=float, default=None, help='the length of the run in seconds')
+    parser.add_argument('--requests', type=int, default=None, help='the number of requests to send')
+    parser.add_argument('--cache', choices=['shared', 'fresh', 'off'], default='shared',
+                        help='the result cache of a server started here: the shared one of the host, a new empty one, or none')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help='also write the report to this file')
+    args = parser.parse_args()
+    if args.duration is None and args.requests is None:
+        args.duration = 10
+    if args.url and args.cache != 'shared':
+        parser.error('--cache only applies to a server started here, not to --url')
+    configure_cache(args.cache)
+
+    report = asyncio.run(run(args))
+    print(f"Target: {report['target']}, {report['mode']}, {report['elapsed']:.1f}s")
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(report, file, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -8,21 +8,59 @@ start is a tuple (x, y) with x as column and y as row, and walls is a set of tup
 ========= Step 1 =========
 Import necessary libraries
 '''
-from frontier import Stack, Queue, PriorityQueue
+from frontier import Stack, Queue, PriorityQueue, BucketQueue
 from utils import *
 from node import Node
+from reduced_graph import ReducedGraph
+from hpa import cached_abstraction
+from sma import MemoryBoundedTree, DEFAULT_MAX_NODES
+from artifact_store import maze_key
+from components import label_components
+from landmarks import landmark_table, landmark_heuristic
+from parallel_search import open_pool, choose_split, run_units, run_ids_unit, run_idas_unit
+from collections import namedtuple
 import time
 
+# An expansion event given out by the solvers while they search: the cell being expanded,
+# its depth in the search, the number of nodes left in the frontier (or on the stack of the
+# depth first searches) and whether the cell is a goal
+SearchEvent = namedtuple('SearchEvent', ['cell', 'depth', 'frontier_size', 'goal_found'])
+
+# the number of SearchEvent given out at once by the solvers
+BATCH_SIZE = 100
+
 """
 ========= Step 2 =========
 Define the Maze class
 """
 class Maze:
-    def __init__(self, size, start, goals, walls):
+    def __init__(self, size, start, goals, walls, reduced=False, artifacts=None):
         self.size = size # size is a tuple (rows, columns)
         self.start = start # start is a tuple with (x, y) where x is column and y is row
         self.goals = goals # goals is a list of tuples with (x, y) where x is column and y is row
-        self.walls = walls # set of tuples with (x, y) where x is column and y is row
+        self.walls = set(walls) # set of tuples with (x, y) where x is column and y is row
+
+        # when reduced is True, the solvers run on the junctions of the dead-end filled and corridor contracted graph
+        self.graph = ReducedGraph(size, start, goals, self.walls) if reduced else None
+
+        # the cluster abstraction for HPA*, taken from the cache of the process on the first HPA* query and then kept for this maze
+        # (shared_abstraction tells whether it is still the cached one, which must not be changed in place)
+        self.abstraction = None
+        self.shared_abstraction = False
+
+        # the ArtifactStore keeping the arrays precomputed for this grid across processes (None to always compute them)
+        self.artifacts = artifacts
+        self.key = None
+
+        # the connected component of every cell, labelled on the first search and then kept for this maze
+        self.components = None
+        # the landmark distance tables of the 'landmarks' heuristic, computed on its first search and then kept for this maze
+        self.landmarks = None
+
+        # the budget of the search being run by _run: its deadline (checked by the parts which run for long
+        # without giving out events) and the number of expansions left (no batch holds more events than that)
+        self.deadline = None
+        self.expansions_left = float('inf')
 
         # keep tract of the single and multiple goal search for representing in the frontend
         self.solution_single = [] # list of list of tuples (x, y) where x is column and y is row
@@ -43,9 +81,20 @@ class Maze:
         self.path_length_single = []
         self.path_length_multiple = 0
 
+        # keep track of the largest number of nodes held in the frontier at once (GBFS and A*)
+        self.max_frontier_size = 0
+
+        # keep track of whether the last search was stopped by its deadline or its expansion budget
+        self.budget_exceeded = False
+
+        # keep track of whether the path of the memory bounded SMA* is known to be optimal (None for the other algorithms)
+        self.optimal = None
 
     ''' Define a function to check all the possible moves'''
     def possible_actions(self, state):
+        if self.graph is not None:
+            return self.graph.actions(state)
+
         x, y = state 
         actions = [
             ('up', (x, y - 1)),
@@ -58,6 +107,82 @@ class Maze:
             if 0 <= new_x < self.size[1] and 0 <= new_y < self.size[0] and (new_x, new_y) not in self.walls:
                 possible_actions.append((action, (new_x, new_y)))
         return possible_actions
+
+    ''' Define a function to add or remove a wall, updating the preprocessed data of the maze'''
+    def set_wall(self, cell, is_wall=True):
+        if is_wall:
+            self.walls.add(cell)
+        else:
+            self.walls.discard(cell)
+
+        if self.graph is not None:
+            self.graph = ReducedGraph(self.size, self.start, self.goals, self.walls)
+        # only the clusters around the cell are recomputed
+        if self.abstraction is not None:
+            if self.shared_abstraction:
+                self.abstraction = self.abstraction.detach(self.walls)
+                self.shared_abstraction = False
+            self.abstraction.update(cell)
+        # the grid has a new hash, so its artifacts are looked up again
+        self.key = None
+        self.components = None
+        self.landmarks = None
+
+    ''' Define a function to get an array precomputed for the grid, mapped from the artifact store when there is one'''
+    def get_artifact(self, name, compute):
+        if self.artifacts is None:
+            return compute()
+        if self.key is None:
+            self.key = maze_key(self.size, self.walls)
+        return self.artifacts.get_or_compute(self.key, name, compute)
+
+    ''' Define a function to get the connected component labels of the grid, [y][x] with -1 for the walls'''
+    def get_components(self):
+        if self.components is None:
+            self.components = self.get_artifact('components', lambda: label_components(self.size, self.walls))
+        return self.components
+
+    ''' Define a function to get the landmark distance tables of the grid, (landmarks, rows, cols) with -1 where unreachable'''
+    def get_landmarks(self):
+        if self.landmarks is None:
+            self.landmarks = self.get_artifact('landmarks', lambda: landmark_table(self.size, self.walls, deadline=self.deadline))
+        return self.landmarks
+
+    ''' Define a function to get the heuristic of GBFS and A* to the nearest of the targets, either 'manhattan' or 'landmarks' (ALT)'''
+    def get_heuristic(self, name, targets):
+        if name == 'landmarks':
+            return landmark_heuristic(self.get_landmarks(), self.size, targets)
+        if name != 'manhattan':
+            raise ValueError(f'Unknown heuristic: {name}')
+        return lambda state: min(manhattan_distance(state, goal) for goal in targets)
+
+    ''' Define a function to keep the goals which can be reached from a cell, in their order'''
+    def _reachable_goals(self, state, goals):
+        components = self.get_components()
+        rows, cols = self.size
+        x, y = state
+        label = components[y, x] if 0 <= x < cols and 0 <= y < rows else -1
+        reachable = []
+        for goal in goals:
+            goal_x, goal_y = goal
+            if goal == state or (label >= 0 and 0 <= goal_x < cols and 0 <= goal_y < rows and components[goal_y, goal_x] == label):
+                reachable.append(goal)
+        return reachable
+
+    ''' Define a function to get the cluster abstraction used by HPA*'''
+    def get_abstraction(self, cluster_size=10):
+        if self.abstraction is None or self.abstraction.cluster_size != cluster_size:
+            if self.key is None:
+                self.key = maze_key(self.size, self.walls)
+            self.abstraction = cached_abstraction(self.key, self.size, self.walls, cluster_size, self.deadline)
+            self.shared_abstraction = True
+        return self.abstraction
+
+    ''' Define a function to get the cost of moving between two neighbouring states'''
+    def step_cost(self, state, next_state):
+        if self.graph is not None:
+            return self.graph.cost(state, next_state)
+        return 1
     
     ''' Define a function to reconstruct the path from the start to the goal'''
     def reconstruct_path(self, node):
@@ -66,12 +191,29 @@ class Maze:
         current_node = node
         while  current_node.parent is not None:
             actions.append(current_node.action)
-            cells.append(current_node.state)
+            if self.graph is not None:
+                # expand the corridor back into cells (in reverse, as the whole list is reversed below)
+                cells.extend(reversed(self.graph.expand(current_node.parent.state, current_node.state)))
+            else:
+                cells.append(current_node.state)
             current_node = current_node.parent
         actions.reverse()
         cells.reverse()
         return actions, cells
 
+    ''' Define a function to expand a path of graph states back into a path of cells'''
+    def expand_path(self, path):
+        if self.graph is None or not path:
+            return path
+
+        cells = [path[0]]
+        for state, next_state in zip(path, path[1:]):
+            if state == next_state:
+                cells.append(next_state)
+            else:
+                cells.extend(self.graph.expand(state, next_state))
+        return cells
+
     def _convert_path_to_actions(self, path):
         """Convert a path of coordinates to a list of actions"""
         if len(path) < 2:
@@ -95,6 +237,15 @@ class Maze:
 
     def print_results(self, filename, method):
         """Print results in the required assignment format"""
+        # the server calls the solvers without a file name, so there is nothing to print
+        if filename is None:
+            return
+
+        if self.budget_exceeded:
+            print(f"{filename} {method}")
+            print(f"Search budget exceeded; {self.num_explored_multiple}")
+            return
+
         if len(self.goals) == 1:
             # Single goal case
             if self.solution_single:
@@ -146,9 +297,8 @@ class Maze:
                 print(f"{filename} {method}")
                 print(f"No goal is reachable; {nodes_explored}")
 
-    ''' SOLVING BFS AND DFS '''
-    def solve_bfs_dfs(self, filename, algorithm='bfs'):
-        start_time = time.time()
+    ''' Define a function to reset all the results before a new search'''
+    def _reset_results(self):
         self.explored = set()
         self.solution = []
         self.solution_single = []
@@ -159,507 +309,861 @@ class Maze:
         self.num_explored_multiple = 0
         self.path_length_single = []
         self.path_length_multiple = 0
-        full_actions = []
+        self.max_frontier_size = 0
+        self.visited_by_depth_all = []
+        self.success = None
+        self.budget_exceeded = False
+        self.optimal = None
+
+    ''' Define a function to store the path and the explored nodes of a goal which was found'''
+    def _record_leg(self, path, explored):
+        self.solution_single.append(path)
+        self.solution_multiple.extend(path)
+        self.nodes_explored_single.append(explored)
+        self.num_explored_single.append(len(explored))
+        self.path_length_single.append(len(path))
+        self.path_length_multiple += len(path)
+
+    ''' Define a function to finish a search, keeping its result and the time it took'''
+    def _finish(self, start_time, success):
+        self.time_taken = time.time() - start_time
+        self.success = success
+        return success
+
+    '''
+    Every solver is written as a generator (iter_*) which yields the expansion events
+    in batches of batch_size SearchEvent, so a caller can pause it (by not asking for
+    the next batch), resume it, or cancel it (with close()). The results are stored
+    in the same attributes as before while the search goes on, and self.success is
+    set once the search is over. The solve_* functions below just run the generator
+    to the end and print the results.
+    '''
+    def _run(self, steps, filename, method, deadline=None, max_expansions=None):
+        # deadline is a time.time() timestamp and max_expansions a number of expanded nodes, both checked
+        # after every batch; once one of them is reached the search is stopped with budget_exceeded set,
+        # unless it finishes without expanding anything more. The batches are cut to the expansions left,
+        # so the search stops right at max_expansions, and the long parts without batches check the
+        # deadline themselves and raise DeadlineExceeded
+        start_time = time.time()
+        self.budget_exceeded = False
+        self.deadline = deadline
+        self.expansions_left = max_expansions if max_expansions is not None else float('inf')
+        expanded = 0
+        try:
+            for batch in steps:
+                expanded += len(batch)
+                self.expansions_left -= len(batch)
+                if (deadline is not None and time.time() > deadline) or self.expansions_left <= 0:
+                    # the leg of a goal in the last batch is only recorded when the solver resumes, so it is
+                    # resumed once more with no expansion left: it either finishes there, or gives out one
+                    # more event (which is not counted) and is stopped
+                    self.expansions_left = 0
+                    if next(steps, None) is not None:
+                        steps.close()
+                        self._stop(start_time, expanded)
+                    break
+        except DeadlineExceeded:
+            self._stop(start_time, expanded)
+        finally:
+            self.deadline = None
+            self.expansions_left = float('inf')
+        self.print_results(filename, method)
+        return self.success
+
+    def _stop(self, start_time, expanded):
+        # keep the results gathered so far as partial statistics, counting every expansion made
+        # (the depth first searches only add the explored nodes of a leg once its goal is found)
+        self.budget_exceeded = True
+        self.success = False
+        self.num_explored_multiple = expanded
+        self.time_taken = time.time() - start_time
+
+    ''' Define a function to give out a list of events in batches, cut to the expansions left'''
+    def _batches(self, events, batch_size):
+        index = 0
+        while index < len(events):
+            end = index + max(1, min(batch_size, self.expansions_left))
+            yield events[index:end]
+            index = end
+
+    ''' Define a function to get the generator of any solver by the name of its algorithm'''
+    def iter_solve(self, algorithm, batch_size=BATCH_SIZE, **options):
+        if algorithm in ['bfs', 'dfs']:
+            return self.iter_bfs_dfs(algorithm, batch_size)
+        elif algorithm in ['gbfs', 'as']:
+            return self.iter_gbfs_as(algorithm, batch_size=batch_size, **options)
+        elif algorithm == 'hpa':
+            return self.iter_hpa(batch_size=batch_size, **options)
+        elif algorithm == 'smas':
+            return self.iter_smas(batch_size=batch_size, **options)
+        elif algorithm == 'backtracking':
+            return self.iter_backtracking(batch_size)
+        elif algorithm == 'depthlimited':
+            return self.iter_depthlimited(batch_size=batch_size, **options)
+        elif algorithm == 'ids':
+            if options.get('workers', 1) > 1:
+                return self.iter_ids_parallel(batch_size=batch_size, **options)
+            options.pop('workers', None)
+            return self.iter_ids(batch_size=batch_size, **options)
+        elif algorithm == 'idas':
+            if options.get('workers', 1) > 1:
+                return self.iter_idas_parallel(batch_size=batch_size, **options)
+            options.pop('workers', None)
+            return self.iter_idas(batch_size=batch_size, **options)
+        raise ValueError(f'Unknown algorithm: {algorithm}')
 
-        Frontier = Queue if algorithm == 'bfs' else Stack
+    ''' SOLVING BFS AND DFS '''
+    def solve_bfs_dfs(self, filename=None, algorithm='bfs', deadline=None, max_expansions=None):
+        return self._run(self.iter_bfs_dfs(algorithm), filename, algorithm.upper(), deadline, max_expansions)
+
+    def iter_bfs_dfs(self, algorithm='bfs', batch_size=BATCH_SIZE):
+        start_time = time.time()
+        self._reset_results()
+        batch = []
+
+        # the edges of the reduced graph are corridors of different lengths, so BFS orders its frontier by
+        # the cost from the start (a uniform-cost search) to keep returning the shortest paths
+        weighted = algorithm == 'bfs' and self.graph is not None
+        Frontier = PriorityQueue if weighted else Queue if algorithm == 'bfs' else Stack
         current_start = self.start
         remaining_goals = list(self.goals)
-        found_goals = []
 
         while remaining_goals:
+            # stop at once when no remaining goal is in the component of the current start
+            if not self._reachable_goals(current_start, remaining_goals):
+                break
+
             frontier = Frontier()
             start_node = Node(state=current_start, parent=None, action=None)
             frontier.add(start_node)
             current_explored = []
-            num_explored_single = 0
             self.explored = set()
+            best_cost = {current_start: 0}
 
             goal_found = False
 
             while not frontier.isEmpty():
                 node = frontier.remove()
+                if weighted and (node.state in self.explored or node.cost > best_cost[node.state]):
+                    continue
                 self.num_explored_multiple += 1
-                num_explored_single += 1
                 self.explored.add(node.state)
                 current_explored.append(node.state)
                 self.nodes_explored_multiple.append(node.state)
-                
+
                 # Check if the current node state is any of the remaining goals
-                if node.state in remaining_goals:
+                goal_found = node.state in remaining_goals
+                batch.append(SearchEvent(node.state, node.depth, len(frontier), goal_found))
+                if len(batch) >= batch_size or len(batch) >= self.expansions_left:
+                    yield batch
+                    batch = []
+
+                if goal_found:
                     current_goal = node.state
-                    found_goals.append(current_goal)
                     remaining_goals.remove(current_goal)  # Remove the found goal
                     current_start = current_goal
                     actions, cells = self.reconstruct_path(node)
-                    full_actions.extend(actions)
-                    self.nodes_explored_single.append(current_explored)
-                    self.num_explored_single.append(num_explored_single)
-                    self.solution_single.append(cells)
-                    self.solution_multiple.extend(cells)
-                    self.path_length_multiple += len(cells)
-                    self.path_length_single.append(len(cells))
-                    num_explored_single = 0
-                    current_explored = []
-                    goal_found = True
+                    self._record_leg(cells, current_explored)
                     break
 
-            
                 for action, state in self.possible_actions(node.state):
-                    if not frontier.contain_state(state) and state not in self.explored:
+                    if weighted:
+                        cost = node.cost + self.step_cost(node.state, state)
+                        if state not in self.explored and cost < best_cost.get(state, float('inf')):
+                            best_cost[state] = cost
+                            frontier.add(Node(state=state, parent=node, action=action, cost=cost))
+                    elif not frontier.contain_state(state) and state not in self.explored:
                         child = Node(state=state, parent=node, action=action)
                         frontier.add(child)
 
             if not goal_found:
-                self.time_taken = time.time() - start_time
-                method = algorithm.upper()
-                self.print_results(filename, method)
-                return False
-            
-        self.time_taken = time.time() - start_time
-        method = algorithm.upper()
-        self.print_results(filename, method)
-        return True
-    
+                break
+
+        if batch:
+            yield batch
+        return self._finish(start_time, not remaining_goals)
+
     ''' SOlVING GREEDY BEST FIRST SEARCH AND ASTAR'''
-    def solve_gbfs_as(self, filename, algorithm="as"):
+    def solve_gbfs_as(self, filename=None, algorithm="as", queue="heap", multi_target=False, deadline=None, max_expansions=None, heuristic="manhattan"):
+        method = "GBFS" if algorithm == "gbfs" else "AS"
+        return self._run(self.iter_gbfs_as(algorithm, queue, multi_target, heuristic=heuristic), filename, method, deadline, max_expansions)
+
+    def iter_gbfs_as(self, algorithm="as", queue="heap", multi_target=False, batch_size=BATCH_SIZE, heuristic="manhattan"):
         start_time = time.time()
-        self.explored = set()
-        self.solution = []
-        self.solution_single = []
-        self.solution_multiple = []
-        self.nodes_explored_single = []
-        self.nodes_explored_multiple = []
-        self.num_explored_single = []
-        self.num_explored_multiple = 0
-        self.path_length_single = []
-        self.path_length_multiple = 0
+        self._reset_results()
+        batch = []
 
+        # the bucket queue needs integer costs, which holds for the grid and the reduced graph
+        Frontier = BucketQueue if queue == "bucket" else PriorityQueue
         remaining_goals = list(self.goals)
         current_start = self.start
-        found_goals = []
-        full_actions = []
 
         while remaining_goals:
+            # only the goals in the component of the current start can be targets
+            reachable_goals = self._reachable_goals(current_start, remaining_goals)
+            if not reachable_goals:
+                break
+
             self.explored = set()
             current_explored = []
-            num_explored_single = 0
-            frontier = PriorityQueue()
+            frontier = Frontier()
+            # best_cost[state] is the cheapest cost found so far to reach the state, so a cheaper path
+            # found later is still added, and the older, more expensive nodes are skipped when removed
+            best_cost = {current_start: 0}
+
+            if multi_target:
+                # Search for all the remaining goals at once and stop at the first one removed from the frontier,
+                # the heuristic being the distance to the nearest of them
+                targets = set(reachable_goals)
+            else:
+                # Find the closest goal using Manhattan distance
+                targets = {min(reachable_goals, key=lambda goal: manhattan_distance(current_start, goal))}
 
-            # Find the closest goal using Manhattan distance
-            closest_goal = min(remaining_goals, key=lambda goal: manhattan_distance(current_start, goal))
-            
-            # Start node setup
+            # Start node setup, with the heuristic to the nearest target (Manhattan distance, or the landmark bound)
+            estimate = self.get_heuristic(heuristic, targets)
             start_node = Node(state=current_start, parent=None, action=None, cost=0)
-            heuristic = manhattan_distance(current_start, closest_goal)
-            start_node.heuristic = heuristic
+            start_node.heuristic = estimate(current_start)
             frontier.add(start_node)
 
             goal_found = False
 
             while not frontier.isEmpty():
                 node = frontier.remove()
-                if node.state in self.explored:
+                if node.state in self.explored or node.cost > best_cost[node.state]:
                     continue
 
                 self.explored.add(node.state)
                 current_explored.append(node.state)
                 self.nodes_explored_multiple.append(node.state)
-                num_explored_single += 1
                 self.num_explored_multiple += 1
 
-                # Check if we reached the closest goal
-                if node.state == closest_goal:
+                # Check if we reached the closest goal (or any of the goals when searching for all of them)
+                goal_found = node.state in targets
+                batch.append(SearchEvent(node.state, node.depth, len(frontier), goal_found))
+                if len(batch) >= batch_size or len(batch) >= self.expansions_left:
+                    yield batch
+                    batch = []
+
+                if goal_found:
                     current_goal = node.state
-                    found_goals.append(current_goal)
-                    remaining_goals.remove(closest_goal)  # Remove the specific goal we found
+                    remaining_goals.remove(current_goal)  # Remove the specific goal we found
                     current_start = current_goal
 
                     actions, cells = self.reconstruct_path(node)
-                    full_actions.extend(actions)
-                    self.solution_single.append(cells)
-                    self.solution_multiple.extend(cells)
-                    self.nodes_explored_single.append(current_explored)
-                    self.num_explored_single.append(num_explored_single)
-                    self.path_length_single.append(len(cells))
-                    self.path_length_multiple += len(cells)
-
-                    goal_found = True
+                    self._record_leg(cells, current_explored)
                     break
 
                 for action, state in self.possible_actions(node.state):
-                    if not frontier.contain_state(state) and state not in self.explored:
+                    if state in self.explored:
+                        continue
+                    # GBFS keeps all costs at 0, so it only adds the first node found for every state
+                    cost = 0 if algorithm == "gbfs" else node.cost + self.step_cost(node.state, state)
+                    if cost < best_cost.get(state, float('inf')):
+                        best_cost[state] = cost
                         # Use heuristic to the closest goal
-                        heuristic = manhattan_distance(state, closest_goal)
-                        cost = 0 if algorithm == "gbfs" else node.cost + 1
-                        child = Node(state=state, parent=node, action=action, cost=cost, heuristic=heuristic)
+                        child = Node(state=state, parent=node, action=action, cost=cost, heuristic=estimate(state))
                         frontier.add(child)
+                self.max_frontier_size = max(self.max_frontier_size, len(frontier))
 
             if not goal_found:
-                self.time_taken = time.time() - start_time
-                method = "GBFS" if algorithm == "gbfs" else "AS"
-                self.print_results(filename, method)
-                return False
+                break
 
-        self.time_taken = time.time() - start_time
-        method = "GBFS" if algorithm == "gbfs" else "AS"
-        self.print_results(filename, method)
-        return True
+        if batch:
+            yield batch
+        return self._finish(start_time, not remaining_goals)
 
-    ''' SOLVING BACKTRACKING '''
-    def solve_backtracking(self, filename):
+    ''' SOLVING HIERARCHICAL PATHFINDING A* (HPA*)'''
+    def solve_hpa(self, filename=None, cluster_size=10, deadline=None, max_expansions=None):
+        return self._run(self.iter_hpa(cluster_size), filename, "HPA", deadline, max_expansions)
+
+    def iter_hpa(self, cluster_size=10, batch_size=BATCH_SIZE):
         start_time = time.time()
-        self.solution = []
-        self.solution_single = []
-        self.solution_multiple = []
-        self.nodes_explored_single = []
-        self.nodes_explored_multiple = []
-        self.num_explored_single = []
-        self.num_explored_multiple = 0
-        self.path_length_single = []
-        self.path_length_multiple = 0
+        self._reset_results()
 
+        abstraction = self.get_abstraction(cluster_size)
+        remaining_goals = list(self.goals)
         current_start = self.start
+
+        while remaining_goals:
+            # Find the closest goal using Manhattan distance, like GBFS and A*, among the goals in the component of the current start
+            reachable_goals = self._reachable_goals(current_start, remaining_goals)
+            if not reachable_goals:
+                break
+            closest_goal = min(reachable_goals, key=lambda goal: manhattan_distance(current_start, goal))
+            if self.expansions_left <= 0:
+                # the whole leg runs before its events are given out, so with no expansion left it is not started
+                yield []
+            cells, current_explored = abstraction.find_path(current_start, closest_goal, self.deadline)
+            goal_found = cells is not None
+
+            self.nodes_explored_multiple.extend(current_explored)
+            self.num_explored_multiple += len(current_explored)
+
+            # the abstract search runs at once, so its events are only given out after every leg
+            events = [SearchEvent(cell, None, None, False) for cell in current_explored]
+            if goal_found and events:
+                events[-1] = SearchEvent(closest_goal, len(cells), None, True)
+            yield from self._batches(events, batch_size)
+
+            if not goal_found:
+                break
+
+            remaining_goals.remove(closest_goal)
+            current_start = closest_goal
+            self._record_leg(cells, current_explored)
+
+        return self._finish(start_time, not remaining_goals)
+
+    ''' SOLVING SMA* (SIMPLIFIED MEMORY-BOUNDED A*)'''
+    def solve_smas(self, filename=None, max_nodes=DEFAULT_MAX_NODES, deadline=None, max_expansions=None):
+        return self._run(self.iter_smas(max_nodes), filename, "SMAS", deadline, max_expansions)
+
+    def iter_smas(self, max_nodes=DEFAULT_MAX_NODES, batch_size=BATCH_SIZE):
+        # A* holding at most max_nodes nodes at once, see sma.py; the legs go to the closest goal like A*,
+        # and every expansion is given out as an event, including the expansions of forgotten nodes done again
+        start_time = time.time()
+        self._reset_results()
+        self.optimal = True
+        batch = []
+
         remaining_goals = list(self.goals)
+        current_start = self.start
 
         while remaining_goals:
-            path = []
-            self._current_explored = []
-            found_goal = None
+            reachable_goals = self._reachable_goals(current_start, remaining_goals)
+            if not reachable_goals:
+                break
+            target = min(reachable_goals, key=lambda goal: manhattan_distance(current_start, goal))
+            heuristic = lambda state: manhattan_distance(state, target)
+            is_goal = lambda state: state == target
+
+            tree = MemoryBoundedTree(self.size, max_nodes)
+            tree.add_root(current_start, heuristic(current_start))
+            # the explored cells are kept once each, however often they are expanded again
+            self.explored = set()
+            current_explored = []
 
-            # Try to find any of the remaining goals using backtracking
-            if self._backtrack_search(current_start, remaining_goals, path, visited=set()):
-                # The found goal is stored in the last element of the path
-                found_goal = path[-1]
-                remaining_goals.remove(found_goal)
-                
-                complete_path = [current_start] + path
-                self.solution_single.append(complete_path)
-                self.solution_multiple.extend(complete_path)
-                self.nodes_explored_single.append(self._current_explored.copy())
-                self.nodes_explored_multiple.extend(self._current_explored)
-                self.num_explored_single.append(len(self._current_explored))
-                self.num_explored_multiple += len(self._current_explored)
-                self.path_length_single.append(len(complete_path))
-                self.path_length_multiple += len(complete_path)
-                current_start = found_goal
-            else:
-                self.time_taken = time.time() - start_time
-                self.print_results(filename, "BACKTRACKING")
-                return False
+            goal_found = False
+            while True:
+                node = tree.best()
+                if node is None:
+                    break
 
-        self.time_taken = time.time() - start_time
-        self.print_results(filename, "BACKTRACKING")
-        return True
+                goal_found = is_goal(node.state)
+                if node.successors is None or goal_found:
+                    self.num_explored_multiple += 1
+                    if node.state not in self.explored:
+                        self.explored.add(node.state)
+                        current_explored.append(node.state)
+                        self.nodes_explored_multiple.append(node.state)
+                    batch.append(SearchEvent(node.state, node.depth, tree.open_nodes, goal_found))
+                    if len(batch) >= batch_size or len(batch) >= self.expansions_left:
+                        yield batch
+                        batch = []
+
+                if goal_found:
+                    remaining_goals.remove(target)
+                    current_start = target
+                    actions, cells = self.reconstruct_path(node)
+                    self._record_leg(cells, current_explored)
+                    break
 
-    def _backtrack_search(self, current, goals, path, visited):
-        self._current_explored.append(current)
-        visited.add(current)
+                if node.successors is None:
+                    node.successors = [(action, state, self.step_cost(node.state, state))
+                                       for action, state in self.possible_actions(node.state)
+                                       if node.parent is None or state != node.parent.state]
 
-        # Check if current position is any of the goals
-        if current in goals:
-            return True
+                child = tree.next_successor(node, heuristic, is_goal)
+                if not node.can_generate():
+                    tree.finish_node(node)
+                if child is not None:
+                    tree.shrink((node, child))
+                self.max_frontier_size = max(self.max_frontier_size, tree.open_nodes)
 
-        actions = self.possible_actions(current)
+            # a leg is optimal unless the depth the tree can hold cut off part of the search
+            self.optimal = self.optimal and goal_found and not tree.cut
+            if not goal_found:
+                break
 
-        for action, (nx, ny) in actions:
-            next_state = (nx, ny)
-            if (0 <= nx < self.size[1] and 0 <= ny < self.size[0] and 
-                next_state not in self.walls and next_state not in visited):
+        if batch:
+            yield batch
+        if remaining_goals:
+            self.optimal = False
+        return self._finish(start_time, not remaining_goals)
 
-                path.append(next_state)
-                if self._backtrack_search(next_state, goals, path, visited):
-                    return True
-                path.pop()
+    ''' SOLVING BACKTRACKING '''
+    def solve_backtracking(self, filename=None, deadline=None, max_expansions=None):
+        return self._run(self.iter_backtracking(), filename, "BACKTRACKING", deadline, max_expansions)
 
-        return False
-    
-    ''' SOLVING DEPTH LIMITED '''
-    def solve_depthlimited(self, filename, limit):
+    def iter_backtracking(self, batch_size=BATCH_SIZE):
         start_time = time.time()
-
-        # Reset all tracking data
-        self.solution = []
-        self.solution_single = []
-        self.solution_multiple = []
-        self.nodes_explored_single = []
-        self.nodes_explored_multiple = []
-        self.num_explored_single = []
-        self.num_explored_multiple = 0
-        self.path_length_single = []
-        self.path_length_multiple = 0
-        self.visited_by_depth_all = []
+        self._reset_results()
 
         current_start = self.start
         remaining_goals = list(self.goals)
 
         while remaining_goals:
-            found = False  # flag to break after first reachable goal
+            if not self._reachable_goals(current_start, remaining_goals):
+                break
 
-            for goal in remaining_goals:
-                path = []
-                self._current_explored = []
-                visited = set()
-                visited_by_depth = {}
+            path = []
+            self._current_explored = []
 
-                result, found_goal = self._dls_recursive(
-                    current=current_start,
-                    goals=remaining_goals,
-                    limit=limit,
-                    path=path,
-                    visited=visited,
-                    visited_by_depth=visited_by_depth,
-                    depth=0
-                )
+            # Try to find any of the remaining goals using backtracking
+            found_goal = yield from self._backtrack_search(current_start, remaining_goals, path, set(), batch_size)
+            if found_goal is None:
+                break
+
+            # The found goal is stored in the last element of the path
+            remaining_goals.remove(found_goal)
+            complete_path = self.expand_path([current_start] + path)
+            self._record_leg(complete_path, self._current_explored.copy())
+            self.nodes_explored_multiple.extend(self._current_explored)
+            self.num_explored_multiple += len(self._current_explored)
+            current_start = found_goal
+
+        return self._finish(start_time, not remaining_goals)
+
+    def _backtrack_search(self, start, goals, path, visited, batch_size):
+        # The recursion is kept on an explicit stack of the moves left to try from every state on the path,
+        # so deep mazes do not hit the recursion limit and the search can stop at every batch
+        batch = []
+        stack = []
+        next_state = start
+        while True:
+            if next_state is not None:
+                self._current_explored.append(next_state)
+                visited.add(next_state)
+
+                # Check if current position is any of the goals
+                goal_found = next_state in goals
+                batch.append(SearchEvent(next_state, len(path), len(stack), goal_found))
+                if len(batch) >= batch_size or len(batch) >= self.expansions_left:
+                    yield batch
+                    batch = []
+
+                if goal_found:
+                    if batch:
+                        yield batch
+                    return next_state
+                stack.append(iter(self.possible_actions(next_state)))
+
+            if not stack:
+                break
+
+            next_state = None
+            for action, state in stack[-1]:
+                if state not in visited:
+                    path.append(state)
+                    next_state = state
+                    break
+            else:
+                # all the moves from this state were tried, so go back to the previous state
+                stack.pop()
+                if path:
+                    path.pop()
 
-                if result == "found":
-                    complete_path = [current_start] + path
-                    self.solution_single.append(complete_path)
-                    self.solution_multiple.extend(complete_path)
-                    self.nodes_explored_single.append(self._current_explored.copy())
-                    self.nodes_explored_multiple.extend(self._current_explored)
-                    self.num_explored_single.append(len(self._current_explored))
-                    self.num_explored_multiple += len(self._current_explored)
-                    self.path_length_single.append(len(complete_path))
-                    self.path_length_multiple += len(complete_path)
-                    self.visited_by_depth_all.append(visited_by_depth)
+        if batch:
+            yield batch
+        return None
 
-                    current_start = found_goal
-                    remaining_goals.remove(found_goal)
-                    found = True
-                    break
+    ''' SOLVING DEPTH LIMITED '''
+    def solve_depthlimited(self, filename=None, limit=30, deadline=None, max_expansions=None):
+        return self._run(self.iter_depthlimited(limit), filename, "DLS", deadline, max_expansions)
 
-            if not found:
-                self.time_taken = time.time() - start_time
-                self.print_results(filename, "DLS")
-                return False
+    def iter_depthlimited(self, limit=30, batch_size=BATCH_SIZE):
+        start_time = time.time()
+        self._reset_results()
 
-        self.time_taken = time.time() - start_time
-        self.print_results(filename, "DLS")
-        return True
-
-    def _dls_recursive(self, current, goals, limit, path, visited, visited_by_depth, depth):
-        self._current_explored.append(current)
-        visited.add(current)
-
-        if depth not in visited_by_depth:
-            visited_by_depth[depth] = []
-        visited_by_depth[depth].append(current)
-
-        if current in goals:
-            return "found", current
-
-        if limit <= 0:
-            return "cutoff", None
-
-        cutoff_occurred = False
-        actions = self.possible_actions(current)
-
-        for action, (nx, ny) in actions:
-            next_state = (nx, ny)
-            if (0 <= nx < self.size[1] and 0 <= ny < self.size[0] and
-                next_state not in self.walls and next_state not in visited):
-
-                path.append(next_state)
-                result, found_goal = self._dls_recursive(
-                    current=next_state,
-                    goals=goals,
-                    limit=limit - 1,
-                    path=path,
-                    visited=visited,
-                    visited_by_depth=visited_by_depth,
-                    depth=depth + 1
-                )
-                if result == "found":
-                    return "found", found_goal
-                elif result == "cutoff":
-                    cutoff_occurred = True
-                path.pop()
+        current_start = self.start
+        remaining_goals = list(self.goals)
 
-        return ("cutoff", None) if cutoff_occurred else ("failure", None)
+        while remaining_goals:
+            if not self._reachable_goals(current_start, remaining_goals):
+                break
+
+            path = []
+            self._current_explored = []
+            visited_by_depth = {}
+
+            # the search looks for any of the remaining goals, so it is run once for all of them
+            found_goal = yield from self._dls_search(current_start, remaining_goals, limit, path, set(), visited_by_depth, batch_size)
+            if found_goal is None:
+                break
+
+            complete_path = self.expand_path([current_start] + path)
+            self._record_leg(complete_path, self._current_explored.copy())
+            self.nodes_explored_multiple.extend(self._current_explored)
+            self.num_explored_multiple += len(self._current_explored)
+            self.visited_by_depth_all.append(visited_by_depth)
+
+            current_start = found_goal
+            remaining_goals.remove(found_goal)
+
+        return self._finish(start_time, not remaining_goals)
+
+    def _dls_search(self, start, goals, limit, path, visited, visited_by_depth, batch_size):
+        # Same explicit stack as the backtracking search, but the states at depth limit are not expanded.
+        # The depth is the number of cells moved (the sum of the step costs), so on the reduced graph
+        # a corridor counts for its length and not for one move; depths[i] is the depth of the i-th state
+        batch = []
+        stack = []
+        depths = [0]
+        next_state = start
+        while True:
+            if next_state is not None:
+                depth = depths[-1]
+                self._current_explored.append(next_state)
+                visited.add(next_state)
+                visited_by_depth.setdefault(depth, []).append(next_state)
+
+                goal_found = next_state in goals
+                batch.append(SearchEvent(next_state, depth, len(stack), goal_found))
+                if len(batch) >= batch_size or len(batch) >= self.expansions_left:
+                    yield batch
+                    batch = []
+
+                if goal_found:
+                    if batch:
+                        yield batch
+                    return next_state
+                if depth < limit:
+                    stack.append(iter(self.possible_actions(next_state)))
+                elif path:
+                    # cut off at the depth limit
+                    path.pop()
+                    depths.pop()
+
+            if not stack:
+                break
+
+            next_state = None
+            current = path[-1] if path else start
+            for action, state in stack[-1]:
+                step = self.step_cost(current, state)
+                if state not in visited and depths[-1] + step <= limit:
+                    path.append(state)
+                    depths.append(depths[-1] + step)
+                    next_state = state
+                    break
+            else:
+                stack.pop()
+                if path:
+                    path.pop()
+                    depths.pop()
+
+        if batch:
+            yield batch
+        return None
 
     '''SOLVING ITERATIVE DEEPENING DEPTH FIRST SEARCH'''
-    def solve_ids(self, filename, limit):
+    def solve_ids(self, filename=None, limit=30, deadline=None, max_expansions=None, workers=1):
+        steps = self.iter_ids_parallel(limit, workers) if workers > 1 else self.iter_ids(limit)
+        return self._run(steps, filename, "IDS", deadline, max_expansions)
+
+    def iter_ids(self, limit=30, batch_size=BATCH_SIZE):
         start_time = time.time()
-        # Reset data
-        self.solution = []
-        self.solution_single = []
-        self.solution_multiple = []
-        self.nodes_explored_single = []
-        self.nodes_explored_multiple = []
-        self.num_explored_single = []
-        self.num_explored_multiple = 0
-        self.path_length_single = []
-        self.path_length_multiple = 0
-        self.visited_by_depth_all = []
+        self._reset_results()
 
         current_start = self.start
         remaining_goals = list(self.goals)
 
         while remaining_goals:
-            found = False
+            # without this check, every depth up to the limit would be searched in vain
+            if not self._reachable_goals(current_start, remaining_goals):
+                break
+
             goal_explored = []
             visited_by_depth_combined = {}
+            found_goal = None
 
             for depth in range(1, limit + 1):
                 self._current_explored = []
                 path = []
-                visited = set()
                 visited_by_depth = {}
 
-                result, found_goal = self._dls_recursive(
-                    current=current_start,
-                    goals=remaining_goals,
-                    limit=depth,
-                    path=path,
-                    visited=visited,
-                    visited_by_depth=visited_by_depth,
-                    depth=0
-                )
+                found_goal = yield from self._dls_search(current_start, remaining_goals, depth, path, set(), visited_by_depth, batch_size)
 
                 goal_explored.extend(self._current_explored)
 
                 # Combine visited_by_depth
                 for d, nodes in visited_by_depth.items():
-                    if d not in visited_by_depth_combined:
-                        visited_by_depth_combined[d] = []
-                    visited_by_depth_combined[d].extend(nodes)
+                    visited_by_depth_combined.setdefault(d, []).extend(nodes)
 
-                if result == "found":
-                    complete_path = [current_start] + path
-                    self.solution_single.append(complete_path)
-                    self.solution_multiple.extend(complete_path)
-                    self.nodes_explored_single.append(goal_explored.copy())
+                if found_goal is not None:
+                    complete_path = self.expand_path([current_start] + path)
+                    self._record_leg(complete_path, goal_explored.copy())
                     self.nodes_explored_multiple.extend(goal_explored)
-                    self.num_explored_single.append(len(goal_explored))
                     self.num_explored_multiple += len(goal_explored)
-                    self.path_length_single.append(len(complete_path))
-                    self.path_length_multiple += len(complete_path)
                     self.visited_by_depth_all.append(visited_by_depth_combined)
 
                     current_start = found_goal
                     remaining_goals.remove(found_goal)
-                    found = True
                     break  # Stop further depth increases
 
-            if not found:
-                self.time_taken = time.time() - start_time
-                self.print_results(filename, "IDS")
-                return False
+            if found_goal is None:
+                break
+
+        return self._finish(start_time, not remaining_goals)
+
+    ''' Define a function to give out the cells searched by a parallel work unit as expansion events'''
+    def _unit_events(self, cells, found_goal, batch_size):
+        events = [SearchEvent(cell, None, None, False) for cell in cells]
+        if found_goal is not None and events:
+            events[-1] = SearchEvent(found_goal, None, None, True)
+        yield from self._batches(events, batch_size)
+
+    ''' Define a function to merge the results of a parallel work unit into the results of the leg'''
+    def _merge_unit(self, result, goal_explored, visited_by_depth_combined, batch_size):
+        goal_explored.extend(result['explored'])
+        for d, nodes in result['visited_by_depth'].items():
+            visited_by_depth_combined.setdefault(d, []).extend(nodes)
+        yield from self._unit_events(result['explored'], result['found'], batch_size)
+
+    '''
+    Parallel IDS: the same iterations as iter_ids, but once the depth limit passes the split depth
+    (chosen to give every worker a few work units) the subtrees below the split are searched by a
+    process pool, see parallel_search.py. Each unit keeps its own visited cells, so the explored
+    nodes differ from the sequential IDS, but they do not depend on the order the workers finish in.
+    The paths can differ too: the sequential IDS does not enter a cell again once an earlier subtree
+    of the same iteration visited it, while a unit may go through the cells of the other units, so it
+    can reach a goal by another path, of another length (on test/maze_11.txt the second leg takes 15
+    cells with one worker and 13 with three). Neither search guarantees the shortest path.
+    '''
+    def iter_ids_parallel(self, limit=30, workers=2, batch_size=BATCH_SIZE):
+        start_time = time.time()
+        self._reset_results()
 
-        self.time_taken = time.time() - start_time
-        self.print_results(filename, "IDS")
-        return True
+        current_start = self.start
+        remaining_goals = list(self.goals)
+        pool, best = open_pool(self, workers)
 
+        try:
+            while remaining_goals:
+                if not self._reachable_goals(current_start, remaining_goals):
+                    break
+
+                goal_explored = []
+                visited_by_depth_combined = {}
+                found_goal = None
+                split, units, expanded = choose_split(self, current_start, remaining_goals, workers)
+
+                for depth in range(1, limit + 1):
+                    if depth <= split:
+                        # the first levels are too small to be worth sending to the pool
+                        self._current_explored = []
+                        path = []
+                        visited_by_depth = {}
+                        found_goal = yield from self._dls_search(current_start, remaining_goals, depth, path, set(), visited_by_depth, batch_size)
+                        goal_explored.extend(self._current_explored)
+                        for d, nodes in visited_by_depth.items():
+                            visited_by_depth_combined.setdefault(d, []).extend(nodes)
+                    else:
+                        # the cells above the units are expanded again in every iteration, like in the sequential search
+                        goal_explored.extend(expanded)
+                        yield from self._unit_events(expanded, None, batch_size)
+                        for result in run_units(pool, best, run_ids_unit, units, remaining_goals, depth, batch_size, deadline=self.deadline):
+                            yield from self._merge_unit(result, goal_explored, visited_by_depth_combined, batch_size)
+                            if result['found'] is not None:
+                                found_goal, path = result['found'], result['path']
+                                break
+
+                    if found_goal is not None:
+                        complete_path = self.expand_path([current_start] + path)
+                        self._record_leg(complete_path, goal_explored.copy())
+                        self.nodes_explored_multiple.extend(goal_explored)
+                        self.num_explored_multiple += len(goal_explored)
+                        self.visited_by_depth_all.append(visited_by_depth_combined)
+
+                        current_start = found_goal
+                        remaining_goals.remove(found_goal)
+                        break
+
+                if found_goal is None:
+                    break
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+        return self._finish(start_time, not remaining_goals)
 
     ''' SOLVING IDAS'''
-    def solve_idas(self, filename, limit):
+    def solve_idas(self, filename=None, limit=30, deadline=None, max_expansions=None, workers=1):
+        steps = self.iter_idas_parallel(limit, workers) if workers > 1 else self.iter_idas(limit)
+        return self._run(steps, filename, "IDAS", deadline, max_expansions)
+
+    def iter_idas(self, limit=30, batch_size=BATCH_SIZE):
         start_time = time.time()
-        # Reset data
-        self.solution = []
-        self.solution_single = []
-        self.solution_multiple = []
-        self.nodes_explored_single = []
-        self.nodes_explored_multiple = []
-        self.num_explored_single = []
-        self.num_explored_multiple = 0
-        self.path_length_single = []
-        self.path_length_multiple = 0
-        self.visited_by_depth_all = []
-        
+        self._reset_results()
+
         current_start = self.start
         remaining_goals = list(self.goals)
-        
+        found = True
+
         while remaining_goals:
-            current_goal = remaining_goals.pop(0)
+            # take the first remaining goal in the component of the current start, instead of
+            # raising the threshold up to the limit for a goal which cannot be reached
+            reachable_goals = self._reachable_goals(current_start, remaining_goals)
+            if not reachable_goals:
+                found = False
+                break
+            current_goal = reachable_goals[0]
+            remaining_goals.remove(current_goal)
             threshold = manhattan_distance(current_start, current_goal)
             found = False
             iterations = 0
             goal_explored = []
             visited_by_depth_combined = {}
-            
+
             while iterations < limit:
                 self._current_explored = []
-                path = []
-                path.append(current_start)
+                path = [current_start]
                 visited_by_depth = {}
-                
-                result = self._idas_search(
-                    current=current_start, 
-                    goal=current_goal, 
-                    g_cost=0, 
-                    threshold=threshold, 
-                    path=path,
-                    visited_by_depth=visited_by_depth,
-                    depth=0
-                )
-                
+
+                result = yield from self._idas_search(current_goal, threshold, path, visited_by_depth, batch_size)
+
                 goal_explored.extend(self._current_explored)
-                
+
                 # Combine visited_by_depth for this goal
                 for d, nodes in visited_by_depth.items():
-                    if d not in visited_by_depth_combined:
-                        visited_by_depth_combined[d] = []
-                    visited_by_depth_combined[d].extend(nodes)
-                
+                    visited_by_depth_combined.setdefault(d, []).extend(nodes)
+
                 if result == "found":
-                    complete_path = [current_start] + path
-                    self.solution_single.append(complete_path)
-                    self.solution_multiple.extend(complete_path)
-                    self.nodes_explored_single.append(goal_explored.copy())
+                    complete_path = self.expand_path([current_start] + path)
+                    self._record_leg(complete_path, goal_explored.copy())
                     self.nodes_explored_multiple.extend(goal_explored)
-                    self.num_explored_single.append(len(goal_explored))
                     self.num_explored_multiple += len(goal_explored)
-                    self.path_length_single.append(len(complete_path))
-                    self.path_length_multiple += len(complete_path)
                     self.visited_by_depth_all.append(visited_by_depth_combined)
                     current_start = current_goal
                     found = True
                     break
-                elif isinstance(result, (int, float)) and result != float('inf'):
+                elif result != float('inf'):
                     threshold = result
                 else:
                     break
-                
+
                 iterations += 1
-            
+
             if not found:
-                self.time_taken = time.time() - start_time
-                self.print_results(filename, "IDAS")
-                return False
-        
-        self.time_taken = time.time() - start_time
-        self.print_results(filename, "IDAS")
-        return True
+                break
 
-    def _idas_search(self, current, goal, g_cost, threshold, path, visited_by_depth, depth):
-        self._current_explored.append(current)
-        
-        # Track visited nodes by depth
-        if depth not in visited_by_depth:
-            visited_by_depth[depth] = []
-        visited_by_depth[depth].append(current)
-        
-        f_cost = g_cost + manhattan_distance(current, goal)
-        
-        if f_cost > threshold:
-            return f_cost
-        
-        if current == goal:
-            return "found"
-        
-        minimum = float('inf')
-        actions = self.possible_actions(current)
-        
-        for action, (nx, ny) in actions:
-            if (0 <= nx < self.size[1] and 0 <= ny < self.size[0] and 
-                (nx, ny) not in self.walls and (nx, ny) not in path and (nx, ny) != current):
-                
-                path.append((nx, ny))
-                result = self._idas_search((nx, ny), goal, g_cost + 1, threshold, path, visited_by_depth, depth + 1)
-                if result == "found":
+        return self._finish(start_time, found)
+
+    '''
+    Parallel IDA*: the same iterations as iter_idas, with every iteration searched by a process pool,
+    one work unit per path down to the split depth, see parallel_search.py. The threshold of the next
+    iteration is the smallest f-cost over the threshold found by any of the units.
+    '''
+    def iter_idas_parallel(self, limit=30, workers=2, batch_size=BATCH_SIZE):
+        start_time = time.time()
+        self._reset_results()
+
+        current_start = self.start
+        remaining_goals = list(self.goals)
+        found = True
+        pool, best = open_pool(self, workers)
+
+        try:
+            while remaining_goals:
+                reachable_goals = self._reachable_goals(current_start, remaining_goals)
+                if not reachable_goals:
+                    found = False
+                    break
+                current_goal = reachable_goals[0]
+                remaining_goals.remove(current_goal)
+                threshold = manhattan_distance(current_start, current_goal)
+                found = False
+                iterations = 0
+                goal_explored = []
+                visited_by_depth_combined = {}
+                _, units, expanded = choose_split(self, current_start, [current_goal], workers)
+
+                while iterations < limit:
+                    goal_explored.extend(expanded)
+                    yield from self._unit_events(expanded, None, batch_size)
+
+                    minimum = float('inf')
+                    for result in run_units(pool, best, run_idas_unit, units, current_goal, threshold, batch_size, deadline=self.deadline):
+                        yield from self._merge_unit(result, goal_explored, visited_by_depth_combined, batch_size)
+                        if result['found'] is not None:
+                            found = True
+                            path = result['path']
+                            break
+                        minimum = min(minimum, result['minimum'])
+
+                    if found:
+                        complete_path = self.expand_path([current_start] + path)
+                        self._record_leg(complete_path, goal_explored.copy())
+                        self.nodes_explored_multiple.extend(goal_explored)
+                        self.num_explored_multiple += len(goal_explored)
+                        self.visited_by_depth_all.append(visited_by_depth_combined)
+                        current_start = current_goal
+                        break
+                    elif minimum != float('inf'):
+                        threshold = minimum
+                    else:
+                        break
+
+                    iterations += 1
+
+                if not found:
+                    break
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+        return self._finish(start_time, found)
+
+    def _idas_search(self, goal, threshold, path, visited_by_depth, batch_size, g_cost=0):
+        # Explicit stack of [moves left to try, cost to reach the state, smallest f-cost over the threshold]
+        # for every state on the path, the path itself starting with the start state; g_cost is the cost
+        # of reaching the last state of the given path (not 0 when a parallel work unit starts below the start)
+        batch = []
+        stack = []
+        on_path = set(path)
+        next_state = path[-1]
+        while True:
+            if next_state is not None:
+                depth = len(path) - 1
+                self._current_explored.append(next_state)
+                visited_by_depth.setdefault(depth, []).append(next_state)
+
+                f_cost = g_cost + manhattan_distance(next_state, goal)
+                goal_found = f_cost <= threshold and next_state == goal
+                batch.append(SearchEvent(next_state, depth, len(stack), goal_found))
+                if len(batch) >= batch_size or len(batch) >= self.expansions_left:
+                    yield batch
+                    batch = []
+
+                if f_cost > threshold:
+                    if not stack:
+                        if batch:
+                            yield batch
+                        return f_cost
+                    stack[-1][2] = min(stack[-1][2], f_cost)
+                    path.pop()
+                elif goal_found:
+                    if batch:
+                        yield batch
                     return "found"
-                elif isinstance(result, (int, float)) and result < minimum:
-                    minimum = result
-                path.pop()
-        
-        return minimum
\ No newline at end of file
+                else:
+                    stack.append([iter(self.possible_actions(next_state)), g_cost, float('inf')])
+                    on_path.add(next_state)
+
+            current = path[-1]
+            next_state = None
+            for action, state in stack[-1][0]:
+                if state not in on_path:
+                    g_cost = stack[-1][1] + self.step_cost(current, state)
+                    path.append(state)
+                    next_state = state
+                    break
+            else:
+                # all the moves were tried, so give the smallest f-cost over the threshold back to the previous state
+                _, _, minimum = stack.pop()
+                if not stack:
+                    break
+                on_path.discard(path.pop())
+                stack[-1][2] = min(stack[-1][2], minimum)
+
+        if batch:
+            yield batch
+        return minimum
@@ -0,0 +1,314 @@
+'''
+Seeded maze generator for load and scaling tests.
+The mazes are built as numpy arrays (1 for a wall, 0 for an open cell, indexed as
+grid[y][x]), and can be written both in the text format read by utils.read_maze
+and in the JSON request shape accepted by the /solve endpoint of server.py.
+
+The available methods, with the time they take for a 4000x4000 maze on one core
+(the time grows with the number of cells; the ranges are from two machines):
++ backtracker: recursive backtracker (depth first carving), long winding corridors. 10 to 18 s,
+its carving is a Python loop over every cell, one step after the other
++ prim: randomized Prim's algorithm, many short dead-ends. 12 to 22 s, a Python loop as well
++ kruskal: randomized Kruskal's algorithm, an unbiased labyrinth. About 5 s, vectorized with numpy
++ rooms: rectangular rooms joined by L-shaped corridors. About 1 s
++ random: every cell is a wall with probability density. Well under 1 s
+
+Usage: python maze_generator.py <method> --rows 4000 --cols 4000 --seed 1 --text maze.txt --json maze.json
+'''
+
+'''
+========= Step 1 =========
+Import necessary libraries
+'''
+import argparse
+import json
+import random
+import time
+import numpy as np
+
+METHODS = ['backtracker', 'prim', 'kruskal', 'rooms', 'random']
+
+"""
+========= Step 2 =========
+Define the labyrinth methods. They carve a perfect maze on the cells with odd
+coordinates, every cell (i, j) of the cell grid being the grid cell (2j + 1, 2i + 1).
+The cell grid is padded with a border of cells which are already visited, and the
+cells are kept as flat indices c = (i + 1) * (width + 2) + (j + 1), so the carving
+loops only check a bytearray without any bound check, and the grid is written at
+once at the end.
+"""
+def _cell_grid(rows, cols):
+    height, width = (rows - 1) // 2, (cols - 1) // 2
+    if height < 1 or width < 1:
+        raise ValueError('A labyrinth needs at least 3 rows and 3 columns')
+    return height, width
+
+def _padded_cells(height, width):
+    # returns the visited marks with the border already visited, and the flat index of every inner cell
+    marks = np.ones((height + 2, width + 2), dtype=np.uint8)
+    marks[1:-1, 1:-1] = 0
+    cells = (np.arange(1, height + 1)[:, None] * (width + 2) + np.arange(1, width + 1)[None, :]).ravel()
+    return bytearray(marks.tobytes()), cells
+
+def _carve(rows, cols, width, carved_walls):
+    # carved_walls is a flat list of pairs of neighbouring padded cell indices
+    height = (rows - 1) // 2
+    grid = np.ones((rows, cols), dtype=np.uint8)
+    grid[1:2 * height:2, 1:2 * width:2] = 0
+    if len(carved_walls):
+        walls = np.asarray(carved_walls, dtype=np.int64)
+        padded = width + 2
+        ys = 2 * (walls // padded - 1) + 1
+        xs = 2 * (walls % padded - 1) + 1
+        # two neighbouring cells are on the same row or column, so the wall between them is in the middle
+        grid[(ys[0::2] + ys[1::2]) // 2, (xs[0::2] + xs[1::2]) // 2] = 0
+    return grid
+
+def generate_backtracker(rows, cols, rng, pick):
+    height, width = _cell_grid(rows, cols)
+    visited, cells = _padded_cells(height, width)
+    padded = width + 2
+    first = int(cells[rng.integers(len(cells))])
+    visited[first] = 1
+    stack = [first]
+    carved_walls = []
+
+    while stack:
+        cell = stack[-1]
+        neighbours = [next_cell for next_cell in (cell - padded, cell - 1, cell + padded, cell + 1) if not visited[next_cell]]
+        if not neighbours:
+            stack.pop()
+            continue
+        next_cell = neighbours[int(pick() * len(neighbours))]
+        visited[next_cell] = 1
+        carved_walls += (cell, next_cell)
+        stack.append(next_cell)
+
+    return _carve(rows, cols, width, carved_walls)
+
+def generate_prim(rows, cols, rng, pick):
+    height, width = _cell_grid(rows, cols)
+    # marks are 0 for the cells not seen yet, 1 for the border and the frontier, 2 for the cells in the maze
+    marks, cells = _padded_cells(height, width)
+    padded = width + 2
+    first = int(cells[rng.integers(len(cells))])
+    marks[first] = 2
+    frontier = []
+    for next_cell in (first - padded, first - 1, first + padded, first + 1):
+        if not marks[next_cell]:
+            marks[next_cell] = 1
+            frontier.append(next_cell)
+    carved_walls = []
+
+    while frontier:
+        # remove a random cell of the frontier by swapping it with the last one
+        index = int(pick() * len(frontier))
+        cell = frontier[index]
+        frontier[index] = frontier[-1]
+        frontier.pop()
+
+        # join it to a random neighbour which is already in the maze
+        neighbours = (cell - padded, cell - 1, cell + padded, cell + 1)
+        joined = [next_cell for next_cell in neighbours if marks[next_cell] == 2]
+        carved_walls += (cell, joined[int(pick() * len(joined))])
+        marks[cell] = 2
+
+        for next_cell in neighbours:
+            if not marks[next_cell]:
+                marks[next_cell] = 1
+                frontier.append(next_cell)
+
+    return _carve(rows, cols, width, carved_walls)
+
+def generate_kruskal(rows, cols, rng, pick):
+    height, width = _cell_grid(rows, cols)
+    cells = np.arange(height * width, dtype=np.int64).reshape(height, width)
+
+    # every wall between two neighbouring cells gets a distinct random weight, Kruskal's algorithm
+    # removing the walls in the order of their weights
+    first = np.concatenate([cells[:, :-1].ravel(), cells[:-1, :].ravel()])
+    second = np.concatenate([cells[:, 1:].ravel(), cells[1:, :].ravel()])
+    weights = rng.permutation(len(first))
+
+    # With distinct weights, the walls removed by Kruskal's algorithm are the minimum spanning tree, which
+    # Boruvka's algorithm finds in a few vectorized rounds: every set removes its lightest wall to another set
+    labels = np.arange(height * width, dtype=np.int64)
+    edges = np.arange(len(first))
+    removed = np.zeros(len(first), dtype=bool)
+    while True:
+        first_labels, second_labels = labels[first[edges]], labels[second[edges]]
+        crossing = first_labels != second_labels
+        edges, first_labels, second_labels = edges[crossing], first_labels[crossing], second_labels[crossing]
+        if len(edges) == 0:
+            break
+
+        lightest = np.full(height * width, len(first), dtype=np.int64)
+        np.minimum.at(lightest, first_labels, weights[edges])
+        np.minimum.at(lightest, second_labels, weights[edges])
+        sets = np.flatnonzero(lightest < len(first))
+        by_weight = np.empty(len(first), dtype=np.int64)
+        by_weight[weights[edges]] = edges
+        chosen = by_weight[lightest[sets]]
+        removed[chosen] = True
+
+        # hook every set onto the set on the other side of its wall, the two sets sharing the same
+        # lightest wall pointing at each other; the smaller one becomes the root
+        pointer = np.arange(height * width, dtype=np.int64)
+        chosen_first, chosen_second = labels[first[chosen]], labels[second[chosen]]
+        pointer[sets] = np.where(chosen_first == sets, chosen_second, chosen_first)
+        mutual = (pointer[pointer[sets]] == sets) & (sets < pointer[sets])
+        pointer[sets[mutual]] = sets[mutual]
+        while True:
+            jumped = pointer[pointer]
+            if (jumped == pointer).all():
+                break
+            pointer = jumped
+        labels = pointer[labels]
+
+    removed = np.flatnonzero(removed)
+    # convert the removed walls back into pairs of padded cell indices
+    padded = width + 2
+    pairs = np.empty(2 * len(removed), dtype=np.int64)
+    pairs[0::2] = (first[removed] // width + 1) * padded + first[removed] % width + 1
+    pairs[1::2] = (second[removed] // width + 1) * padded + second[removed] % width + 1
+    return _carve(rows, cols, width, pairs)
+
+"""
+========= Step 3 =========
+Define the open methods
+"""
+def generate_rooms(rows, cols, rng, pick, max_room=12):
+    grid = np.ones((rows, cols), dtype=np.uint8)
+    attempts = max(1, rows * cols // (max_room * max_room))
+
+    # draw the size and the position of every room at once
+    heights = rng.integers(2, max_room + 1, size=attempts)
+    widths = rng.integers(2, max_room + 1, size=attempts)
+    ys = (rng.random(attempts) * np.maximum(rows - heights - 1, 0)).astype(np.int64) + 1
+    xs = (rng.random(attempts) * np.maximum(cols - widths - 1, 0)).astype(np.int64) + 1
+
+    rooms = []
+    for height, width, y, x in zip(heights.tolist(), widths.tolist(), ys.tolist(), xs.tolist()):
+        if y + height >= rows or x + width >= cols:
+            continue
+        # keep a wall of at least one cell around every room
+        if grid[y - 1:y + height + 1, x - 1:x + width + 1].all():
+            grid[y:y + height, x:x + width] = 0
+            rooms.append((x + width // 2, y + height // 2))
+
+    # join every room to the next one in a snake order, so the corridors stay short and all rooms are connected
+    band = max_room * 2
+    rooms.sort(key=lambda room: (room[1] // band, room[0] if (room[1] // band) % 2 == 0 else -room[0]))
+    for (x1, y1), (x2, y2) in zip(rooms, rooms[1:]):
+        grid[y1, min(x1, x2):max(x1, x2) + 1] = 0
+        grid[min(y1, y2):max(y1, y2) + 1, x2] = 0
+    return grid
+
+def generate_random(rows, cols, rng, pick, density=0.3):
+    return (rng.random((rows, cols)) < density).astype(np.uint8)
+
+GENERATORS = {
+    'backtracker': generate_backtracker,
+    'prim': generate_prim,
+    'kruskal': generate_kruskal,
+    'rooms': generate_rooms,
+    'random': generate_random
+}
+
+"""
+========= Step 4 =========
+Define the main function, returning the grid, the start and the goals as (x, y)
+"""
+def generate_maze(method, rows, cols, num_goals=1, seed=None, density=0.3):
+    if method not in GENERATORS:
+        raise ValueError(f'Unknown method: {method}')
+
+    # numpy is used for the vectorized draws, and random for the many single draws of the carving loops
+    rng = np.random.default_rng(seed)
+    pick = random.Random(seed).random
+    if method == 'random':
+        grid = generate_random(rows, cols, rng, pick, density)
+    else:
+        grid = GENERATORS[method](rows, cols, rng, pick)
+
+    # the start and the goals are different open cells
+    open_cells = np.flatnonzero(grid.ravel() == 0)
+    if len(open_cells) < num_goals + 1:
+        raise ValueError('The maze does not have enough open cells for the start and the goals')
+    chosen = rng.choice(open_cells, size=num_goals + 1, replace=False)
+    points = [(int(index % cols), int(index // cols)) for index in chosen]
+    return grid, points[0], points[1:]
+
+"""
+========= Step 5 =========
+Define the writers for the text format and the JSON request shape
+"""
+def write_text(path, grid, start, goals):
+    rows, cols = grid.shape
+
+    # the walls are written as horizontal runs (x, y, width, 1), found where the padded rows change value
+    padded = np.zeros((rows, cols + 2), dtype=np.int8)
+    padded[:, 1:-1] = grid
+    changes = np.diff(padded, axis=1)
+    ys, starts = np.nonzero(changes == 1)
+    _, ends = np.nonzero(changes == -1)
+
+    with open(path, 'w') as file:
+        file.write(f"[{rows},{cols}]\n")
+        file.write(f"({start[0]},{start[1]})\n")
+        file.write("|".join(f"({goal[0]},{goal[1]})" for goal in goals) + "\n")
+        lines = [f"({x},{y},{width},1)" for x, y, width in zip(starts.tolist(), ys.tolist(), (ends - starts).tolist())]
+        if lines:
+            file.write("\n".join(lines) + "\n")
+
+def request_bytes(grid, start, goals, algorithm='bfs', **options):
+    rows, cols = grid.shape
+
+    # every row is written as the bytes "[d,d,...,d]" straight from the grid
+    text = np.full((rows, 2 * cols + 1), ord(','), dtype=np.uint8)
+    text[:, 0] = ord('[')
+    text[:, -1] = ord(']')
+    text[:, 1::2] = grid + ord('0')
+
+    goals_text = ','.join(f'[{goal[0]},{goal[1]}]' for goal in goals)
+    extra = ''.join(f',{json.dumps(key)}:{json.dumps(value)}' for key, value in options.items())
+    return b''.join([
+        b'{"maze":[',
+        b','.join(row.tobytes() for row in text),
+        f'],"start":[{start[0]},{start[1]}],"goals":[{goals_text}],"algorithm":"{algorithm}"{extra}}}'.encode()
+    ])
+
+def write_request(path, grid, start, goals, algorithm='bfs', **options):
+    with open(path, 'wb') as file:
+        file.write(request_bytes(grid, start, goals, algorithm, **options))
+
+def to_request(grid, start, goals, algorithm='bfs', **options):
+    # the request as a dict, for sending it directly instead of writing it to a file
+    request = {'maze': grid.tolist(), 'start': list(start), 'goals': [list(goal) for goal in goals], 'algorithm': algorithm}
+    request.update(options)
+    return request
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate seeded mazes for load and scaling tests.')
+    parser.add_argument('method', choices=METHODS)
+    parser.add_argument('--rows', type=int, default=101)
+    parser.add_argument('--cols', type=int, default=101)
+    parser.add_argument('--goals', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--density', type=float, default=0.3, help='wall probability of the random method')
+    parser.add_argument('--algorithm', default='bfs', help='algorithm written in the JSON request')
+    parser.add_argument('--text', help='path of the text file in the format read by utils.read_maze')
+    parser.add_argument('--json', help='path of the JSON request for the /solve endpoint')
+    args = parser.parse_args()
+
+    start_time = time.time()
+    grid, start, goals = generate_maze(args.method, args.rows, args.cols, args.goals, args.seed, args.density)
+    print(f"Generated a {args.rows}x{args.cols} {args.method} maze in {time.time() - start_time:.2f}s")
+
+    if args.text:
+        write_text(args.text, grid, start, goals)
+    if args.json:
+        write_request(args.json, grid, start, goals, args.algorithm)
+
+if __name__ == '__main__':
+    main()
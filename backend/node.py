@@ -4,6 +4,7 @@ Define the node which will hold:
 + Parent: which is its parents' node
 + Action: which is the current to move to it.
 + Cost: the cost of this node depending on the search algorithm that we use.
++ Depth: the number of moves from the root node.
 """
 
 class Node:
@@ -13,6 +14,7 @@ class Node:
         self.action = action # Action here will be right, left, up, down
         self.cost = cost # Cost will be a numeric value, using for tracking
         self.heuristic = heuristic # Heuristic depending on search algorithm
+        self.depth = parent.depth + 1 if parent is not None else 0 # Depth is the number of moves from the root
     
     def total_cost(self):
         return self.cost + self.heuristic
@@ -0,0 +1,169 @@
+'''
+Parallel IDS and IDA* over a process pool.
+The first levels of the search tree are expanded in the main process, and every
+path down to the split depth becomes a work unit: the subtree under its last cell.
+In every iteration (a depth limit for IDS, a threshold for IDA*) all the units are
+searched by the workers at once, with the limit or the threshold of that iteration.
+
+The units are numbered in the order the sequential search would reach them, and
+a shared value holds the lowest number of a unit which found a goal. A worker
+stops its unit as soon as a unit numbered before it found a goal, so once a goal
+is found only the units which come before it keep running. The main process reads
+the units in their order and stops at the first one which found a goal, so the
+path and the explored nodes do not depend on which worker finished first.
+
+The worker side lives here (the functions must be importable by the workers),
+and the iterations themselves are run by Maze.iter_ids_parallel and Maze.iter_idas_parallel.
+'''
+
+'''
+========= Step 1 =========
+Import necessary libraries
+'''
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from utils import DeadlineExceeded
+
+# no unit has found a goal yet
+NOT_FOUND = 2 ** 31 - 1
+
+# the maze and the shared lowest unit number of each worker process
+_maze = None
+_best = None
+
+"""
+========= Step 2 =========
+Define the pool, whose workers each build the maze once
+"""
+def init_worker(size, start, goals, walls, reduced, best):
+    global _maze, _best
+    # imported here because maze.py imports this module
+    from maze import Maze
+    _maze = Maze(size, start, goals, walls, reduced=reduced)
+    _best = best
+
+def open_pool(maze, workers):
+    best = multiprocessing.Value('i', NOT_FOUND)
+    pool = ProcessPoolExecutor(workers, initializer=init_worker,
+                               initargs=(maze.size, maze.start, maze.goals, maze.walls, maze.graph is not None, best))
+    return pool, best
+
+"""
+========= Step 3 =========
+Define the split of the first levels of the tree into work units
+"""
+def split_units(maze, start, goals, depth):
+    # every simple path from start going down depth moves is a unit, and so is a shorter path
+    # ending at a goal or at a cell it cannot leave; the cells expanded to find them are returned too
+    units = []
+    expanded = []
+    stack = [[start]]
+    while stack:
+        path = stack.pop()
+        cell = path[-1]
+        moves = [state for _, state in maze.possible_actions(cell) if state not in path]
+        if len(path) - 1 == depth or cell in goals or not moves:
+            units.append(path)
+            continue
+        expanded.append(cell)
+        # pushed in reverse, so the paths are taken in the order of possible_actions like the sequential search
+        for state in reversed(moves):
+            stack.append(path + [state])
+    return units, expanded
+
+def choose_split(maze, start, goals, workers, max_depth=8):
+    # the shallowest split which gives every worker a few units
+    for depth in range(1, max_depth + 1):
+        units, expanded = split_units(maze, start, goals, depth)
+        if len(units) >= 4 * workers or all(len(unit) - 1 < depth for unit in units):
+            break
+    return depth, units, expanded
+
+"""
+========= Step 4 =========
+Define the search of one unit in a worker
+"""
+def _drive(index, steps):
+    # run a search generator to its end, unless a unit numbered before this one finds a goal meanwhile
+    try:
+        while True:
+            next(steps)
+            if _best.value < index:
+                steps.close()
+                return None, True
+    except StopIteration as stop:
+        return stop.value, False
+
+def _claim(index):
+    with _best.get_lock():
+        if index < _best.value:
+            _best.value = index
+
+def run_ids_unit(index, prefix, goals, depth, batch_size):
+    # depth is the limit of the iteration, counted in cells from the start of the leg
+    offset = sum(_maze.step_cost(state, next_state) for state, next_state in zip(prefix, prefix[1:]))
+    limit = depth - offset
+    _maze._current_explored = []
+    path = []
+    visited_by_depth = {}
+    if limit < 0:
+        # on the reduced graph the corridors of the prefix may already be longer than the limit
+        return {'found': None, 'aborted': False, 'path': [], 'explored': [], 'visited_by_depth': {}}
+    # the cells of the prefix are not entered again, like the cells already visited in the sequential search
+    found_goal, aborted = _drive(index, _maze._dls_search(prefix[-1], goals, limit, path, set(prefix[:-1]), visited_by_depth, batch_size))
+    if found_goal is not None:
+        _claim(index)
+    return {
+        'found': found_goal,
+        'aborted': aborted,
+        'path': prefix[1:] + path,
+        'explored': _maze._current_explored,
+        'visited_by_depth': {depth + offset: cells for depth, cells in visited_by_depth.items()}
+    }
+
+def run_idas_unit(index, prefix, goal, threshold, batch_size):
+    _maze._current_explored = []
+    path = list(prefix)
+    visited_by_depth = {}
+    g_cost = sum(_maze.step_cost(a, b) for a, b in zip(prefix, prefix[1:]))
+    result, aborted = _drive(index, _maze._idas_search(goal, threshold, path, visited_by_depth, batch_size, g_cost))
+    found = result == "found"
+    if found:
+        _claim(index)
+    return {
+        'found': goal if found else None,
+        'aborted': aborted,
+        'minimum': None if found or aborted else result,
+        # the path starts with the start of the leg, like the path of the sequential IDA*
+        'path': path,
+        'explored': _maze._current_explored,
+        'visited_by_depth': visited_by_depth
+    }
+
+"""
+========= Step 5 =========
+Define the run of all the units of one iteration, read back in their order
+"""
+def run_units(pool, best, function, units, *args, deadline=None):
+    # the units are waited for until the deadline of the search at most, then DeadlineExceeded is raised
+    best.value = NOT_FOUND
+    futures = [pool.submit(function, index, unit, *args) for index, unit in enumerate(units)]
+    found = False
+    try:
+        for future in futures:
+            done, _ = wait([future], timeout=None if deadline is None else max(0, deadline - time.time()))
+            if not done:
+                raise DeadlineExceeded()
+            result = future.result()
+            found = result['found'] is not None
+            yield result
+            if found:
+                break
+    finally:
+        # when the search is closed before a goal is found, every unit is stopped
+        if not found:
+            best.value = -1
+        for future in futures:
+            future.cancel()
+        wait(futures)
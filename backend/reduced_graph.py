@@ -0,0 +1,107 @@
+'''
+Reduced graph of a maze, built by two preprocessing passes over the grid:
++ Dead-end filling: every open cell with at most one open neighbour can never be
+part of a path between two other cells, so it is removed (unless it is the start
+or a goal). Removing a cell may turn its neighbour into a new dead-end, so the
+pass keeps going until no dead-end is left.
++ Corridor contraction: every remaining cell with exactly two open neighbours is
+just a corridor cell. Only the junctions (and the start and goals) are kept as
+nodes, and each corridor between two of them becomes one weighted edge whose
+weight is the number of steps along the corridor.
+
+The solvers in maze.py can then run on the nodes of this graph instead of on every
+single cell, and the corridors are expanded back into cells for the results.
+'''
+
+'''
+========= Step 1 =========
+Define the moves in the same order as Maze.possible_actions
+'''
+MOVES = [
+    ('up', (0, -1)),
+    ('left', (-1, 0)),
+    ('down', (0, 1)),
+    ('right', (1, 0))
+]
+
+"""
+========= Step 2 =========
+Define the ReducedGraph class
+"""
+class ReducedGraph:
+    def __init__(self, size, start, goals, walls):
+        self.size = size # size is a tuple (rows, columns)
+        self.start = start
+        self.goals = list(goals)
+
+        walls = set(walls)
+        rows, cols = size
+        self.open_cells = {(x, y) for y in range(rows) for x in range(cols) if (x, y) not in walls}
+
+        # the start and goals must always stay in the graph
+        self.keep = {cell for cell in [start] + self.goals if cell in self.open_cells}
+
+        self.removed = self._fill_dead_ends()
+        self.nodes = {cell for cell in self.open_cells if cell in self.keep or len(self._neighbours(cell)) != 2}
+
+        # edges[node] = {next_node: (action, weight, cells)} where cells are the cells along the corridor,
+        # excluding node itself and including next_node
+        self.edges = {node: {} for node in self.nodes}
+        for node in self.nodes:
+            self._contract_corridors(node)
+
+    ''' Define a function to get the open neighbours of a cell in the (partly filled) grid'''
+    def _neighbours(self, cell):
+        x, y = cell
+        neighbours = []
+        for action, (dx, dy) in MOVES:
+            next_cell = (x + dx, y + dy)
+            if next_cell in self.open_cells:
+                neighbours.append((action, next_cell))
+        return neighbours
+
+    ''' Define a function to fill all the dead-ends which do not contain the start or a goal'''
+    def _fill_dead_ends(self):
+        removed = 0
+        dead_ends = [cell for cell in self.open_cells if cell not in self.keep and len(self._neighbours(cell)) <= 1]
+        while dead_ends:
+            cell = dead_ends.pop()
+            if cell not in self.open_cells:
+                continue
+            neighbours = self._neighbours(cell)
+            self.open_cells.remove(cell)
+            removed += 1
+            # the neighbour of a filled dead-end may become a dead-end itself
+            for _, next_cell in neighbours:
+                if next_cell not in self.keep and len(self._neighbours(next_cell)) <= 1:
+                    dead_ends.append(next_cell)
+        return removed
+
+    ''' Define a function to follow every corridor leaving a node until the next node'''
+    def _contract_corridors(self, node):
+        for action, cell in self._neighbours(node):
+            previous = node
+            cells = [cell]
+            while cell not in self.nodes:
+                # a corridor cell has exactly two neighbours, so take the one we did not come from
+                following = [next_cell for _, next_cell in self._neighbours(cell) if next_cell != previous]
+                previous, cell = cell, following[0]
+                cells.append(cell)
+
+            # skip the corridors which come back to the same node, and keep the shortest corridor between two nodes
+            if cell == node:
+                continue
+            if cell not in self.edges[node] or len(cells) < self.edges[node][cell][1]:
+                self.edges[node][cell] = (action, len(cells), cells)
+
+    ''' Define a function to return the possible moves from a node, like Maze.possible_actions'''
+    def actions(self, state):
+        return [(action, next_state) for next_state, (action, _, _) in self.edges.get(state, {}).items()]
+
+    ''' Define a function to return the number of steps along the edge between two nodes'''
+    def cost(self, state, next_state):
+        return self.edges[state][next_state][1]
+
+    ''' Define a function to expand the edge between two nodes back into the cells along it'''
+    def expand(self, state, next_state):
+        return self.edges[state][next_state][2]
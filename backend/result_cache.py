@@ -0,0 +1,95 @@
+'''
+Cache of the /solve responses shared by all the uvicorn workers of one host.
+The responses are kept zlib-compressed in a SQLite database, keyed by the hash of
+the normalized request, so a maze solved by one worker is answered straight away
+by any other one. No external service is needed: SQLite in WAL mode lets several
+processes read and write the same file.
++ The server puts its RESULTS_VERSION in every key, so raising it leaves the entries
+of the older solvers unused until the size cap or the TTL removes them.
++ Entries older than the TTL are never returned and are removed when the cache is trimmed.
++ Once the payloads take more than the size cap, the least recently used entries are removed.
+'''
+
+'''
+========= Step 1 =========
+Import necessary libraries
+'''
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+
+# where the cache lives, how large it may grow and how long an entry is kept, unless given to ResultCache
+DEFAULT_PATH = os.environ.get('MAZE_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'maze-results.sqlite3'))
+DEFAULT_MAX_BYTES = int(os.environ.get('MAZE_CACHE_MAX_MB', '64')) * 1024 * 1024
+DEFAULT_TTL = float(os.environ.get('MAZE_CACHE_TTL', '3600'))
+
+"""
+========= Step 2 =========
+Define the ResultCache class
+"""
+class ResultCache:
+    def __init__(self, path=DEFAULT_PATH, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # one connection per process, shared by the threads of the process. Its calls block on the lock and on
+        # the writers of the other processes, so the server makes them from a thread, never from the event loop
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS results ('
+            'key TEXT PRIMARY KEY, payload BLOB NOT NULL, size INTEGER NOT NULL, '
+            'created REAL NOT NULL, accessed REAL NOT NULL)'
+        )
+        self.connection.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+
+    ''' Define a function to return the payload of a key, or None when it is not cached or has expired'''
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT payload FROM results WHERE key = ? AND created > ?', (key, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                return None
+            try:
+                self.connection.execute('UPDATE results SET accessed = ? WHERE key = ?', (now, key))
+            except sqlite3.OperationalError:
+                # the database stayed locked by another writer; the access time only orders the eviction, so the hit is kept
+                pass
+        return zlib.decompress(row[0])
+
+    ''' Define a function to cache the payload of a key, then trim the cache'''
+    def put(self, key, payload):
+        compressed = zlib.compress(payload)
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO results (key, payload, size, created, accessed) VALUES (?, ?, ?, ?, ?)',
+                (key, compressed, len(compressed), now, now)
+            )
+            self._trim(now)
+
+    ''' Define a function to remove the expired entries, then the least recently used ones over the size cap'''
+    def _trim(self, now):
+        self.connection.execute('DELETE FROM results WHERE created <= ?', (now - self.ttl,))
+        total = self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        removed = []
+        for key, size in self.connection.execute('SELECT key, size FROM results ORDER BY accessed'):
+            if total <= self.max_bytes:
+                break
+            removed.append((key,))
+            total -= size
+        self.connection.executemany('DELETE FROM results WHERE key = ?', removed)
+
+    def stats(self):
+        with self.lock:
+            entries, size = self.connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results').fetchone()
+        return {'entries': entries, 'bytes': size}
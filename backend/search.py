@@ -1,32 +1,206 @@
+import argparse
+import collections
+import contextlib
+import glob
+import io
+import json
+import os
 import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, wait
 from maze import *
+from auto_select import choose_engine, engine_settings, maze_features
+
+METHODS = ['bfs', 'dfs', 'gbfs', 'as', 'backtracking', 'depthlimited', 'ids', 'idas', 'hpa', 'smas', 'auto']
+
+def solve(maze, text_file, method, limit=30, queue='heap', workers=1, max_nodes=DEFAULT_MAX_NODES, deadline=None, multi_target=False,
+          heuristic='manhattan'):
+    # Solve the maze and return the result, stopping the search at the deadline (a time.time() timestamp) if one is given
+    if method == 'bfs' or method == 'dfs':
+        return maze.solve_bfs_dfs(text_file, method, deadline=deadline)
+    elif method == 'gbfs' or method == 'as':
+        return maze.solve_gbfs_as(text_file, method, queue=queue, multi_target=multi_target, deadline=deadline, heuristic=heuristic)
+    elif method == 'backtracking':
+        return maze.solve_backtracking(text_file, deadline=deadline)
+    elif method == 'depthlimited':
+        return maze.solve_depthlimited(text_file, limit=limit, deadline=deadline)
+    elif method == 'ids':
+        return maze.solve_ids(text_file, limit=limit, workers=workers, deadline=deadline)
+    elif method == 'idas':
+        return maze.solve_idas(text_file, limit=limit, workers=workers, deadline=deadline)
+    elif method == 'hpa':
+        return maze.solve_hpa(text_file, deadline=deadline)
+    elif method == 'smas':
+        return maze.solve_smas(text_file, max_nodes=max_nodes, deadline=deadline)
+
+def run_job(text_file, method, reduced=False, limit=30, workers=1, max_nodes=DEFAULT_MAX_NODES, timeout=None, heuristic='manhattan'):
+    # Solve one maze file, keeping the assignment-format output of print_results.
+    # timeout is in seconds from the start of this job, so a slow maze only fails its own job
+    deadline = time.time() + timeout if timeout is not None else None
+    result = {'file': text_file, 'method': method}
+    output = io.StringIO()
+    try:
+        if method not in METHODS:
+            raise ValueError(f"Unknown method '{method}'")
+        with contextlib.redirect_stdout(output):
+            size, start, goals, walls = read_maze(text_file)
+            algorithm, queue, multi_target = method, 'heap', False
+            # 'auto' runs the shortest-path engine auto_select expects to be the fastest on this maze
+            if method == 'auto':
+                result['engine'] = choose_engine(maze_features(size, walls, goals))
+                algorithm, options = engine_settings(result['engine'], len(goals))
+                reduced, queue, multi_target = options['reduced'], options['queue'], options['multi_target']
+            maze = Maze(size, start, goals, walls, reduced=reduced)
+            success = solve(maze, text_file, algorithm, limit, queue, workers, max_nodes, deadline, multi_target, heuristic)
+        result.update({
+            'success': success,
+            'explored': maze.num_explored_multiple,
+            'path_length': maze.path_length_multiple,
+            'time': maze.time_taken,
+            'output': output.getvalue()
+        })
+        # SMA* tells whether the tree it could hold was enough to prove its path optimal
+        if maze.optimal is not None:
+            result['optimal'] = maze.optimal
+        if maze.budget_exceeded:
+            result['timed_out'] = True
+    except Exception as e:
+        result.update({'success': False, 'error': f'{type(e).__name__}: {e}', 'output': output.getvalue()})
+    return result
+
+def expand_paths(paths):
+    # Turn the files, globs and directories of the command line into maze files
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, '*.txt'))))
+        elif glob.has_magic(path):
+            files.extend(sorted(glob.glob(path)))
+        else:
+            files.append(path)
+    return files
+
+def print_job(result):
+    # Print a job the way a single run does: the print_results block, then the result of the solver
+    sys.stdout.write(result['output'])
+    if 'error' in result:
+        print(f"{result['file']} {result['method']}")
+        print(f"Error: {result['error']}")
+    else:
+        print(result['success'])
+    sys.stdout.flush()
+
+def report(result, as_json):
+    if as_json:
+        print(json.dumps(result), flush=True)
+    else:
+        print_job(result)
+
+def parse_job(line, args):
+    # A job line is either a JSON object or '<file_name> method [--reduced] [--limit N]'
+    if line.startswith('{'):
+        job = json.loads(line)
+        return job.get('id'), job['file'], job.get('method', args.method), job.get('reduced', args.reduced), job.get('limit', args.limit)
+    parts = line.split()
+    reduced = args.reduced or '--reduced' in parts
+    limit = int(parts[parts.index('--limit') + 1]) if '--limit' in parts else args.limit
+    method = parts[1] if len(parts) > 1 and not parts[1].startswith('--') else args.method
+    return None, parts[0], method, reduced, limit
+
+def serve(args):
+    # Daemon mode: read one job per line from stdin and write one JSON result line per job
+    executor = ProcessPoolExecutor(args.jobs) if args.jobs > 1 else None
+    # the jobs whose result is not written yet, as (id, future); the results are written in the order of the
+    # jobs, each as soon as it and the jobs before it are done, from whichever thread finished it
+    pending = collections.deque()
+    lock = threading.Lock()
+
+    def write_ready(_=None):
+        with lock:
+            while pending and pending[0][1].done():
+                job_id, future = pending.popleft()
+                write_result(job_id, future.result())
+
+    def write_result(job_id, result):
+        if job_id is not None:
+            result['id'] = job_id
+        sys.stdout.write(json.dumps(result) + '\n')
+        sys.stdout.flush()
+
+    def add(job_id, future):
+        with lock:
+            pending.append((job_id, future))
+        future.add_done_callback(write_ready)
+
+    def done(result):
+        future = Future()
+        future.set_result(result)
+        return future
+
+    def wait_all():
+        with lock:
+            futures = [future for _, future in pending]
+        wait(futures)
+        write_ready()
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            # an empty line waits for every job sent so far
+            wait_all()
+            continue
+        try:
+            job_id, text_file, method, reduced, limit = parse_job(line, args)
+        except (ValueError, KeyError, IndexError) as e:
+            add(None, done({'success': False, 'error': f'Invalid job line: {e}', 'line': line}))
+            continue
+        if executor is None:
+            add(job_id, done(run_job(text_file, method, reduced, limit, args.workers, args.max_nodes, args.timeout, args.heuristic)))
+        else:
+            add(job_id, executor.submit(run_job, text_file, method, reduced, limit, args.workers, args.max_nodes, args.timeout,
+                                        args.heuristic))
+
+    wait_all()
+    if executor is not None:
+        executor.shutdown()
 
 def main():
+    parser = argparse.ArgumentParser(
+        usage="python search.py <file_name|glob|directory>... method [--reduced] [--limit N] [--jobs N] [--workers N] [--max-nodes N] [--timeout S] [--heuristic H] [--json]\n"
+              "       python search.py --stdin [method] [--jobs N]")
+    parser.add_argument('inputs', nargs='*', help='the maze files, globs or directories, then the method')
+    parser.add_argument('--reduced', action='store_true', help='search the reduced graph')
+    parser.add_argument('--limit', type=int, default=30, help='the depth limit of depthlimited, ids and idas')
+    parser.add_argument('--jobs', type=int, default=1, help='the number of worker processes')
+    parser.add_argument('--workers', type=int, default=1, help='the processes ids and idas split each search over')
+    parser.add_argument('--max-nodes', type=int, default=DEFAULT_MAX_NODES, help='the nodes smas may hold at once')
+    parser.add_argument('--timeout', type=float, default=None, help='the seconds each maze may be searched for before it is stopped')
+    parser.add_argument('--heuristic', choices=['manhattan', 'landmarks'], default='manhattan', help='the heuristic of gbfs and as')
+    parser.add_argument('--json', action='store_true', help='print one JSON result line per file')
+    parser.add_argument('--stdin', action='store_true', help='read job lines from stdin until it is closed')
+    args = parser.parse_args()
+
     # Check whether the command-line argument is acceptable or not
-    if len(sys.argv) != 3:
-        print("The command should follow 'python search.py <file_name> method'!!")
+    args.method = args.inputs[-1] if args.inputs else None
+    if args.stdin:
+        if len(args.inputs) > 1 or (args.method is not None and args.method not in METHODS):
+            parser.error("the daemon mode takes at most a default method")
+        return serve(args)
+    if len(args.inputs) < 2 or args.method not in METHODS:
+        print("The command should follow 'python search.py <file_name> method [--reduced]'!!")
         return
 
-    # Read the text file to form the maze
-    text_file = sys.argv[1]
-    size, start, goals, walls = read_maze(text_file)
-
-    # Initialize the maze with the size, start, goals and walls
-    maze = Maze(size, start, goals, walls)
-
-    # Solve the maze and return the result
-    if sys.argv[2] == 'bfs' or sys.argv[2] == 'dfs':
-        print(maze.solve_bfs_dfs(text_file, sys.argv[2]))
-    elif sys.argv[2] == 'gbfs' or sys.argv[2] == 'as':
-        print(maze.solve_gbfs_as(text_file, sys.argv[2]))
-    elif sys.argv[2] == 'backtracking':
-        print(maze.solve_backtracking(text_file))
-    elif sys.argv[2] == 'depthlimited':
-        print(maze.solve_depthlimited(text_file, limit=30))
-    elif sys.argv[2] == 'ids':
-        print(maze.solve_ids(text_file, limit=30))
-    elif sys.argv[2] == 'idas':
-        print(maze.solve_idas(text_file, limit=30))
+    files = expand_paths(args.inputs[:-1])
+    jobs = [(text_file, args.method, args.reduced, args.limit, args.workers, args.max_nodes, args.timeout, args.heuristic) for text_file in files]
+    if args.jobs > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(args.jobs) as executor:
+            results = executor.map(run_job, *zip(*jobs), chunksize=max(1, len(jobs) // (args.jobs * 4)))
+            for result in results:
+                report(result, args.json)
+    else:
+        for job in jobs:
+            report(run_job(*job), args.json)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
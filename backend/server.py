@@ -6,14 +6,27 @@ We need to import some necessary modules, including:
 + HTTPException for handing HTTP errors -> from fastapi
 + CORSMiddleware for handing CORS (Cross-Origin Resource Sharing) -> from fastapi.middleware.cors
 + BaseModel for data validation -> from pydantic
++ Response for sending the already encoded JSON of a solved maze -> from fastapi
++ orjson for encoding the response quickly -> import orjson
 + uvicorn for running the server -> import uvicorn
 + other necessary modules for handling requests and responses.
 '''
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from maze import Maze
+from sma import DEFAULT_MAX_NODES
+from artifact_store import ArtifactStore, maze_key
+from result_cache import ResultCache
+from single_flight import SingleFlight
+from admission import AdmissionControl, Overloaded, estimate_cost
+from auto_select import choose_engine, engine_settings, maze_features
+import asyncio
+import hashlib
+import os
+import orjson
 import uvicorn
+import time
 
 
 '''
@@ -29,6 +42,25 @@ app.add_middleware(
     allow_headers=['*'] # allow all headers
 )
 
+# The arrays precomputed for a maze are kept on disk and memory mapped, so all the uvicorn workers share them
+artifacts = ArtifactStore()
+
+# The encoded responses are cached in a SQLite file, so a maze solved by one worker is not solved again by another
+results = ResultCache()
+
+# The solves running on this worker, shared by the identical requests which arrive meanwhile
+solves = SingleFlight()
+
+# The lanes which order the solves of this worker by their estimated cost and reject them when the wait gets too long
+admission = AdmissionControl()
+
+# A search which is given no timeout_ms is stopped after this many milliseconds, so no request holds a worker forever
+DEFAULT_TIMEOUT_MS = 30000
+
+# The version of the cached responses, part of every cache key. The cache outlives the server, so this must be
+# raised whenever a change to the solvers or to the response makes the responses cached before it wrong
+RESULTS_VERSION = 2
+
 '''
 --------------------------- STEP 3 ---------------------------
 Now, we have to use the BaseModel to create the data model for the request and response.
@@ -39,8 +71,16 @@ class MazeRequest(BaseModel):
     maze: list[list[int]] # this is the 2D array of the maze
     start: tuple[int, int] # this is the starting point of the maze (x, y)
     goals: list[tuple[int, int]] # this is the list of goals in the maze (x, y)
-    algorithm: str # this is the algorithm that the users want to use
+    algorithm: str # this is the algorithm that the users want to use, or 'auto' to let the server pick the fastest shortest-path engine
     depth_limit: int | None = None
+    reduced: bool = False # whether to solve on the dead-end filled and corridor contracted graph
+    queue: str = 'heap' # the frontier used by GBFS and A*, either 'heap' or 'bucket'
+    multi_target: bool = False # whether GBFS and A* search for the nearest of all remaining goals on every leg
+    heuristic: str = 'manhattan' # the heuristic of GBFS and A*, either 'manhattan' or 'landmarks' (ALT, from tables kept in the artifact store)
+    timeout_ms: int | None = Field(None, gt=0) # the time the search may take before it is stopped, in milliseconds
+    max_expansions: int | None = Field(None, gt=0) # the number of nodes the search may expand before it is stopped
+    workers: int = 1 # the processes IDS and IDA* split their search tree over (at most the number of CPUs)
+    max_nodes: int | None = None # the nodes SMA* may hold at once (DEFAULT_MAX_NODES when not given)
 
 # Then, we will define the structure of the response that the server will send back to the users.
 # Because the backend will send back to the users so we want to make sure all the values in the response will be used in the frontend.
@@ -56,12 +96,99 @@ class MazeResponse(BaseModel):
     num_explored_single: list[int] # this is the list of number of nodes explored for each single path
     path_length_single: list[int] # this is the list of path lengths for each single goal
     path_length_multiple: int # this is the length of the path that was found for all the goals
+    max_frontier_size: int = 0 # this is the largest number of nodes held in the frontier at once (GBFS and A*)
+    budget_exceeded: bool = False # this is whether the search was stopped by its timeout or expansion budget
+    engine: str | None = None # this is the engine chosen by the 'auto' algorithm, e.g. 'as-reduced'
+    optimal: bool | None = None # this is whether SMA* could prove its path optimal within its memory bound (None for the other algorithms)
+
+# The fields of MazeResponse are only used for the OpenAPI schema of /solve: the solver output is trusted,
+# so the response is encoded straight from the lists of the maze instead of being validated tuple by tuple.
+def encode_response(success, algorithm, maze_instance, engine=None):
+    return orjson.dumps({
+        'success': bool(success),
+        'algorithm': algorithm,
+        'solution_single': maze_instance.solution_single,
+        'solution_multiple': maze_instance.solution_multiple,
+        'time_taken': maze_instance.time_taken,
+        'nodes_explored_single': maze_instance.nodes_explored_single,
+        'nodes_explored_multiple': maze_instance.nodes_explored_multiple,
+        'num_explored_multiple': maze_instance.num_explored_multiple,
+        'num_explored_single': maze_instance.num_explored_single,
+        'path_length_single': maze_instance.path_length_single,
+        'path_length_multiple': maze_instance.path_length_multiple,
+        'max_frontier_size': maze_instance.max_frontier_size,
+        'budget_exceeded': maze_instance.budget_exceeded,
+        'engine': engine,
+        'optimal': maze_instance.optimal
+    })
+
+# The key of a request in the result cache only holds what changes the result: the grid, the start, the goals
+# and the options used by the algorithm. The budget is left out because the stopped searches are not cached.
+def request_key(request: MazeRequest, size, walls, algorithm):
+    options = {'version': RESULTS_VERSION, 'start': list(request.start), 'goals': [list(goal) for goal in request.goals], 'requested': request.algorithm, 'algorithm': algorithm, 'reduced': request.reduced}
+    if algorithm in ['gbfs', 'as']:
+        options.update(queue=request.queue, multi_target=request.multi_target, heuristic=request.heuristic)
+    elif algorithm in ['depthlimited', 'ids', 'idas']:
+        options['depth_limit'] = request.depth_limit or 100
+    elif algorithm == 'smas':
+        options['max_nodes'] = request.max_nodes or DEFAULT_MAX_NODES
+    if algorithm in ['ids', 'idas']:
+        # the work units of the parallel search depend on the number of workers, and so do the explored nodes
+        options['workers'] = parallel_workers(request)
+    return hashlib.sha256(maze_key(size, walls).encode() + orjson.dumps(options, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+# The number of processes used by a parallel IDS or IDA*, 1 for the sequential search
+def parallel_workers(request: MazeRequest):
+    return max(1, min(request.workers, os.cpu_count() or 1))
+
+# Solve a request which is not in the result cache and return its encoded response, caching it unless it was stopped by its budget
+def solve_request(request: MazeRequest, size, start, goals, walls, algorithm, key, engine=None):
+    # Now, we can call the solving algorithm with the given parameters.
+    # Now, we will create a maze instance with teh parameters.
+    maze_instance = Maze(size, start, goals, walls, reduced=request.reduced, artifacts=artifacts)
+
+    # The search is stopped once it runs past its timeout (DEFAULT_TIMEOUT_MS when not given) or its expansion budget.
+    timeout_ms = request.timeout_ms if request.timeout_ms is not None else DEFAULT_TIMEOUT_MS
+    budget = {'deadline': time.time() + timeout_ms / 1000, 'max_expansions': request.max_expansions}
+
+    # Now, we will call the solve method of the maze instance with the given algorithm and search strategy.
+    if algorithm in ["bfs", "dfs"]:
+        result = maze_instance.solve_bfs_dfs(algorithm=algorithm, **budget)
+    elif algorithm in ["gbfs", "as"]:
+        if request.queue not in ['heap', 'bucket']:
+            raise HTTPException(status_code=400, detail=f"Unknown queue: {request.queue}")
+        if request.heuristic not in ['manhattan', 'landmarks']:
+            raise HTTPException(status_code=400, detail=f"Unknown heuristic: {request.heuristic}")
+        result = maze_instance.solve_gbfs_as(algorithm=algorithm, queue=request.queue, multi_target=request.multi_target,
+                                             heuristic=request.heuristic, **budget)
+    elif algorithm == "backtracking":
+        result = maze_instance.solve_backtracking(**budget)
+    elif algorithm == "depthlimited":
+        result = maze_instance.solve_depthlimited(limit=request.depth_limit or 100, **budget)
+    elif algorithm == "ids":
+        result = maze_instance.solve_ids(limit=request.depth_limit or 100, workers=parallel_workers(request), **budget)
+    elif algorithm == "idas":
+        result = maze_instance.solve_idas(limit=request.depth_limit or 100, workers=parallel_workers(request), **budget)
+    elif algorithm == "hpa":
+        result = maze_instance.solve_hpa(**budget)
+    elif algorithm == "smas":
+        if request.max_nodes is not None and request.max_nodes < 2:
+            raise HTTPException(status_code=400, detail="max_nodes should be at least 2")
+        result = maze_instance.solve_smas(max_nodes=request.max_nodes or DEFAULT_MAX_NODES, **budget)
+    else:
+        raise HTTPException(status_code=400, detail=f"Unknown algorithm: {algorithm}")
+
+    content = encode_response(result, request.algorithm, maze_instance, engine)
+    if not maze_instance.budget_exceeded:
+        results.put(key, content)
+    return content
 
 '''
 --------------------------- STEP 4 ---------------------------
 Now, we will create some endpoints to handle the requests from the users.
 + / - to get the welcome message - Mainly for debugging purposes - GET
 + /solve - to solve the maze with the given parameters - POST
++ /metrics - to get the counters of the solves, the lanes and the result cache - GET
 + def a function change the maze into size and walls to pass into the solving algorithm
 '''
 def convert_maze_to_size_and_walls(maze: list[list[int]]):
@@ -85,18 +212,10 @@ async def welcome():
 async def solve_maze(request: MazeRequest):
     # Here, we will handle the request and solve the maze using the given parameters.
     try:
-        # First, we need to check whether the maze is valid or not.
-        if not request.maze or not isinstance(request.maze, list) or not all(isinstance(row, list) for row in request.maze):
+        # Pydantic has already checked the types of the maze, the start and the goals, so only an empty maze is left to reject.
+        if not request.maze:
             raise HTTPException(status_code=400, detail='Invalid maze format. Maze should be a 2D array of integers.')
-        
-        # Second, we need to check whether the start point is valid or not.
-        if not isinstance(request.start, tuple) or len(request.start) != 2 or not all(isinstance(coordinate, int) for coordinate in request.start):
-            raise HTTPException(status_code=400, detail='Invalid start point format. Start point should be a tuple of two integers (x, y).')
-
-        # Third, we need to check whether the end points are valid or not.
-        if not isinstance(request.goals, list) or not all(isinstance(goal, tuple) and len(goal) == 2 and all(isinstance(coordinate, int) for coordinate in goal) for goal in request.goals):
-            raise HTTPException(status_code=400, detail='Invalid goals format. Goals should be a list of tuples (x, y).')
-        
+
         # If everything is valid, we will call the solving algorithm with the given parameters.
         # First, we need to convert the maze to size and walls to pass into the solving algorithm.
         size, walls = convert_maze_to_size_and_walls(request.maze)
@@ -107,10 +226,6 @@ async def solve_maze(request: MazeRequest):
         # Then, we need to set the goals with the correct format.
         goals = [tuple(goal) for goal in request.goals]
 
-        # Now, we can call the solving algorithm with the given parameters.
-        # Now, we will create a maze instance with teh parameters.
-        maze_instance = Maze(size, start, goals, walls)
-
         # Map frontend algorithm names to backend algorithm names
         algorithm_mapping = {
             'bfs': 'bfs',
@@ -120,49 +235,59 @@ async def solve_maze(request: MazeRequest):
             'backtracking': 'backtracking',
             'depthlimited': 'depthlimited',
             'ids': 'ids',    # Changed from 'iddfs' to 'ids'
-            'idas': 'idas'   # Changed from 'idastar' to 'idas'
+            'idas': 'idas',  # Changed from 'idastar' to 'idas'
+            'hpa': 'hpa',
+            'smas': 'smas'
         }
 
-        # Get the correct algorithm name
-        algorithm = algorithm_mapping.get(request.algorithm)
+        # Get the correct algorithm name. For 'auto', the engine is picked from cheap features of the maze
+        # and the calibration of auto_select, and its options replace the ones of the request.
+        engine = None
+        if request.algorithm == 'auto':
+            engine = choose_engine(maze_features(size, walls, goals))
+            algorithm, options = engine_settings(engine, len(goals))
+            request = request.model_copy(update=options)
+        else:
+            algorithm = algorithm_mapping.get(request.algorithm)
         if not algorithm:
             raise HTTPException(status_code=400, detail=f"Unknown algorithm: {request.algorithm}")
 
-        # Now, we will call the solve method of the maze instance with the given algorithm and search strategy.
-        if algorithm in ["bfs", "dfs"]:
-            result = maze_instance.solve_bfs_dfs(algorithm=algorithm)
-        elif algorithm in ["gbfs", "as"]:
-            result = maze_instance.solve_gbfs_as(algorithm=algorithm)
-        elif algorithm == "backtracking":
-            result = maze_instance.solve_backtracking()
-        elif algorithm == "depthlimited":
-            result = maze_instance.solve_depthlimited(limit=request.depth_limit or 100)
-        elif algorithm == "ids":
-            result = maze_instance.solve_ids(limit=request.depth_limit or 100)
-        elif algorithm == "idas":
-            result = maze_instance.solve_idas()
-        else:
-            raise HTTPException(status_code=400, detail=f"Unknown algorithm: {algorithm}")
-
-        return MazeResponse(
-            success=result,
-            algorithm=request.algorithm,
-            solution_single=maze_instance.solution_single,
-            solution_multiple=maze_instance.solution_multiple,
-            time_taken=maze_instance.time_taken,
-            nodes_explored_single=maze_instance.nodes_explored_single,
-            nodes_explored_multiple=maze_instance.nodes_explored_multiple,
-            num_explored_multiple=maze_instance.num_explored_multiple,
-            num_explored_single=maze_instance.num_explored_single,
-            path_length_single=maze_instance.path_length_single,
-            path_length_multiple=maze_instance.path_length_multiple
-        )
+        # An identical request which was already solved, by this worker or another one, is answered from the cache.
+        # SQLite may wait for the writers of the other workers, so the lookup runs in a thread and the event loop keeps going.
+        key = request_key(request, size, walls, algorithm)
+        cached = await asyncio.to_thread(results.get, key)
+        if cached is not None:
+            return Response(content=cached, media_type='application/json', headers={'X-Cache': 'hit'})
+
+        # Identical requests which arrive while the first one is being solved wait for its result instead of solving again.
+        # The solve runs in a thread, so the worker keeps answering the other requests meanwhile.
+        # Before it runs, the solve waits for a slot in the lane of its estimated cost, or is rejected when that wait is too long.
+        flight_key = (key, request.timeout_ms, request.max_expansions)
+        workers = parallel_workers(request) if algorithm in ['ids', 'idas'] else 1
+        cost = estimate_cost(algorithm, size, size[0] * size[1] - len(walls), len(goals), request.depth_limit, request.max_nodes, workers)
+        if request.max_expansions:
+            cost = min(cost, request.max_expansions)
+
+        async def solve():
+            async with admission.slot(cost, workers):
+                return await asyncio.to_thread(solve_request, request, size, start, goals, walls, algorithm, key, engine)
+
+        try:
+            content = await solves.run(flight_key, solve)
+        except Overloaded as e:
+            raise HTTPException(status_code=429, detail=str(e), headers={'Retry-After': str(e.retry_after)})
+        return Response(content=content, media_type='application/json')
     
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+# Metrics endpoint: the solves started and saved by coalescing on this worker, the queue of each lane and the size of the shared result cache
+@app.get("/metrics")
+async def metrics():
+    return {'solves': solves.stats(), 'lanes': admission.stats(), 'result_cache': await asyncio.to_thread(results.stats)}
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -0,0 +1,48 @@
+'''
+Single-flight coalescing of identical concurrent requests.
+The first request for a key starts the computation as a task, and every request
+for the same key which arrives before it is done waits on that task instead of
+starting its own. All of them receive its result, or its exception.
+
+The waiters await the task through asyncio.shield, so a waiter which is cancelled
+(for example because its client went away) stops waiting without cancelling the
+computation the other waiters still need.
+'''
+
+'''
+========= Step 1 =========
+Import necessary libraries
+'''
+import asyncio
+
+"""
+========= Step 2 =========
+Define the SingleFlight class
+"""
+class SingleFlight:
+    def __init__(self):
+        self.in_flight = {} # key -> the task computing it
+        self.started = 0 # the number of computations started
+        self.coalesced = 0 # the number of requests which waited on another one instead of computing
+
+    ''' Define a function to run function() once for all the concurrent callers with the same key'''
+    async def run(self, key, function):
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(function())
+            self.in_flight[key] = task
+            self.started += 1
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    ''' Define a function to free the key once its task is done, whether it succeeded, failed or was cancelled'''
+    def _finish(self, key, task):
+        self.in_flight.pop(key, None)
+        # mark the exception as retrieved, in case every waiter was cancelled before the task failed
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self):
+        return {'started': self.started, 'coalesced': self.coalesced, 'in_flight': len(self.in_flight)}
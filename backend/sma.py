@@ -0,0 +1,269 @@
+'''
+The memory bounded search tree of SMA* (simplified memory-bounded A*).
+A* keeps every node it generates, so its memory grows with the explored region
+of the maze. SMA* keeps at most max_nodes nodes: when the tree is full, the leaf
+with the highest f (the shallowest one among equal f) is forgotten, and its parent
+remembers the f of the forgotten child. The parent can generate that child again
+later, starting from the remembered f instead of the heuristic, so the search
+does not lose what it learnt about the forgotten subtree.
+
+The successors are generated one at a time, with f = max(f of the parent, g + h),
+so f never decreases along a path. Once all the successors of a node have been
+generated, its f is backed up to the lowest f of its children (in the tree or
+forgotten). A node whose every successor is exhausted is removed, and so on up
+to the root. A path deeper than max_nodes - 1 moves does not fit in the tree: a
+node at that depth which is not the goal is dropped and the tree is marked as cut.
+Every f stays a lower bound of the cost of a path through its node, so the path
+found is optimal when the tree was never cut.
+
+Two paths to the same cell with the same cost lead to the same subtrees, so besides
+the tree a flat table keeps the cheapest cost found to every cell and the cell it was
+reached from, and a successor which is not cheaper than it is not generated again.
+The tables have one entry per cell, so the memory of a search is bounded by the
+size of the grid and max_nodes, whatever the number of expansions.
+'''
+
+'''
+========= Step 1 =========
+Import necessary libraries
+'''
+import heapq
+from array import array
+
+INFINITY = float('inf')
+
+# the nodes kept in the tree when no cap is given
+DEFAULT_MAX_NODES = 100000
+
+"""
+========= Step 2 =========
+Define the node of the tree, which holds its children and the f of its forgotten children
+"""
+class SMANode:
+    def __init__(self, state, parent, action, cost, f, order):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.cost = cost # g, the cost from the start of the leg
+        self.f = f
+        self.depth = parent.depth + 1 if parent is not None else 0
+        self.order = order # the number of the node, newer nodes are taken first among equal f and depth
+        self.successors = None # list of (action, state, step cost), filled when the node is expanded
+        self.next = 0 # index of the next successor never generated
+        self.children = {} # state -> SMANode, the children in the tree
+        self.forgotten = {} # state -> backed up f of the children which were forgotten
+        self.in_open = False
+        self.key = f # the f the node has in the open set
+        self.version = 0 # changed whenever the key changes or the node leaves the open set, to skip stale heap entries
+
+    ''' Define a function to check whether the node can still generate a successor'''
+    def can_generate(self):
+        return self.successors is None or self.next < len(self.successors) or bool(self.forgotten)
+
+    ''' Define a function to get the lowest f of what the node generates next'''
+    def next_f(self):
+        if self.successors is None or self.next < len(self.successors):
+            # a successor never generated has at least the f of the node
+            return self.f
+        # otherwise the children in the tree are in the open set themselves, so only the forgotten ones count
+        return max(self.f, min(self.forgotten.values(), default=INFINITY))
+
+"""
+========= Step 3 =========
+Define the tree, with its open set ordered both ways: lowest f and deepest first for the
+expansions, highest f and shallowest first for the nodes to forget
+"""
+class MemoryBoundedTree:
+    def __init__(self, size, max_nodes=DEFAULT_MAX_NODES):
+        if max_nodes < 2:
+            raise ValueError('SMA* needs room for at least 2 nodes')
+        self.cols = size[1]
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        self.open_nodes = 0
+        self.cut = False # whether a node was cut off by the depth the tree can hold
+        self.forgets = 0
+        self.order = 0
+        self.best_first = [] # heap of (key, -depth, -order, version, node)
+        self.worst_first = [] # heap of (-key, depth, order, version, node)
+        cells = size[0] * size[1]
+        self.best_cost = array('d', [INFINITY]) * cells
+        self.reached_from = array('i', [-1]) * cells
+
+    def index(self, state):
+        x, y = state
+        return y * self.cols + x
+
+    ''' Define a function to create the root of a leg'''
+    def add_root(self, state, heuristic):
+        self.best_cost[self.index(state)] = 0
+        root = self._new_node(state, None, None, 0, heuristic)
+        self.nodes += 1
+        self._enter_open(root)
+        return root
+
+    def _new_node(self, state, parent, action, cost, f):
+        self.order += 1
+        return SMANode(state, parent, action, cost, f, self.order)
+
+    """
+    ========= Step 3.1 =========
+    The open set holds the nodes which can still generate a successor, ordered by next_f
+    """
+    def _push(self, node):
+        node.key = node.next_f()
+        node.version += 1
+        heapq.heappush(self.best_first, (node.key, -node.depth, -node.order, node.version, node))
+        heapq.heappush(self.worst_first, (-node.key, node.depth, node.order, node.version, node))
+        self._compact()
+
+    def _enter_open(self, node):
+        if not node.in_open:
+            node.in_open = True
+            self.open_nodes += 1
+            self._push(node)
+
+    def _leave_open(self, node):
+        if node.in_open:
+            node.in_open = False
+            self.open_nodes -= 1
+            node.version += 1
+
+    def _refresh(self, node):
+        # called after the f, the next successor or the forgotten children of a node changed
+        if node.in_open and node.next_f() != node.key:
+            self._push(node)
+
+    def _push_leaf(self, node):
+        # a node of the open set which became a leaf again may be forgotten in turn
+        if node.in_open and not node.children:
+            heapq.heappush(self.worst_first, (-node.key, node.depth, node.order, node.version, node))
+
+    def _compact(self):
+        # the stale entries are dropped once they outnumber the live ones, so the heaps stay bounded by the tree
+        if len(self.best_first) > 2 * self.open_nodes + 64:
+            self.best_first = [entry for entry in self.best_first if entry[4].in_open and entry[3] == entry[4].version]
+            heapq.heapify(self.best_first)
+        if len(self.worst_first) > 2 * self.open_nodes + 64:
+            self.worst_first = [entry for entry in self.worst_first if entry[4].in_open and entry[3] == entry[4].version]
+            heapq.heapify(self.worst_first)
+
+    ''' Define a function to get the node with the lowest key, the deepest among equal keys, or None when the open set is empty'''
+    def best(self):
+        while self.best_first:
+            _, _, _, version, node = self.best_first[0]
+            if node.in_open and version == node.version:
+                return node
+            heapq.heappop(self.best_first)
+        return None
+
+    """
+    ========= Step 3.2 =========
+    Define the generation of the successors, one at a time
+    """
+    def _admit(self, state, cost, parent_state):
+        # a successor is generated when it is the cheapest way found to its cell, or the same way again
+        index = self.index(state)
+        parent_index = self.index(parent_state)
+        if cost < self.best_cost[index]:
+            self.best_cost[index] = cost
+            self.reached_from[index] = parent_index
+            return True
+        return cost == self.best_cost[index] and self.reached_from[index] == parent_index
+
+    def next_successor(self, node, heuristic, is_goal):
+        # return the next child of the node (already added to the tree), or None when it has nothing left to generate
+        child = None
+        while child is None and node.can_generate():
+            if node.next < len(node.successors):
+                action, state, step = node.successors[node.next]
+                node.next += 1
+                remembered = 0
+            else:
+                # every successor was generated once, so the forgotten one with the lowest f is generated again
+                state = min(node.forgotten, key=node.forgotten.get)
+                remembered = node.forgotten.pop(state)
+                action, step = next((action, step) for action, successor, step in node.successors if successor == state)
+            cost = node.cost + step
+            if not self._admit(state, cost, node.state):
+                continue
+            if not is_goal(state) and node.depth + 2 >= self.max_nodes:
+                # the path to this child already fills the tree, so it could never be extended
+                self.cut = True
+                continue
+            child = self._new_node(state, node, action, cost, max(node.f, cost + heuristic(state), remembered))
+            node.children[state] = child
+            self.nodes += 1
+            self._enter_open(child)
+        self._refresh(node)
+        return child
+
+    """
+    ========= Step 3.3 =========
+    Define the backing up of f and the removal of the exhausted nodes
+    """
+    def finish_node(self, node):
+        # called when the node has nothing left to generate: it leaves the open set and its f is backed up
+        self._leave_open(node)
+        self.back_up(node)
+
+    def back_up(self, node):
+        # the exhausted nodes are removed up the tree, but a finite f is only backed up one level: the f of a
+        # node out of the open set is read again when it gets back in (see _forget), and a stale f is lower
+        # than the backed up one, so it is still a lower bound of the paths through the node
+        while node is not None and not node.can_generate():
+            f = self._backed_up_f(node)
+            if f != INFINITY:
+                node.f = max(node.f, f)
+                return
+            # no successor is left, so the node is removed
+            parent = node.parent
+            self._remove(node)
+            node = parent
+
+    def _backed_up_f(self, node):
+        return min(min((child.f for child in node.children.values()), default=INFINITY),
+                   min(node.forgotten.values(), default=INFINITY))
+
+    def _remove(self, node):
+        self._leave_open(node)
+        self.nodes -= 1
+        parent = node.parent
+        if parent is not None:
+            del parent.children[node.state]
+            self._push_leaf(parent)
+
+    """
+    ========= Step 3.4 =========
+    Define the forgetting of the worst leaves once the tree is full
+    """
+    def shrink(self, keep):
+        # forget leaves until the tree fits, never the nodes in keep (the node being expanded and its new child)
+        held = []
+        while self.nodes > self.max_nodes and self.worst_first:
+            entry = heapq.heappop(self.worst_first)
+            node = entry[4]
+            if not node.in_open or entry[3] != node.version or node.children:
+                # stale, or not a leaf any more: pushed again when its last child is removed
+                continue
+            if node in keep or node.parent is None:
+                held.append(entry)
+                continue
+            self._forget(node)
+        for entry in held:
+            heapq.heappush(self.worst_first, entry)
+
+    def _forget(self, node):
+        parent = node.parent
+        # the parent remembers the best f known below the node
+        f = max(node.f, node.next_f())
+        self._remove(node)
+        self.forgets += 1
+        parent.forgotten[node.state] = min(f, parent.forgotten.get(node.state, INFINITY))
+        if parent.in_open:
+            self._refresh(parent)
+        else:
+            # the parent had generated everything, and now it can generate the forgotten child again,
+            # from the f backed up from its children
+            parent.f = max(parent.f, self._backed_up_f(parent))
+            self._enter_open(parent)
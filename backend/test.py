@@ -1,6 +1,10 @@
 import subprocess
+import contextlib
+import io
+import json
 import os
 import random
+from maze import Maze
 
 def generate_maze(index, method="random", size_range=(5, 10), max_goals=2):
     rows = random.randint(*size_range)
@@ -54,6 +58,9 @@ os.makedirs(maze_folder, exist_ok=True)
 algorithms = ['bfs', 'dfs', 'gbfs', 'as', 'backtracking', 'depthlimited', 'ids', 'idas']
 mazes_per_algorithm = 125
 
+# Every maze is stopped by search.py after this many seconds, so a slow maze only fails itself
+timeout_per_maze = 100
+
 expected_total = len(algorithms) * mazes_per_algorithm
 existing_mazes = {
     f for f in os.listdir(maze_folder)
@@ -71,6 +78,7 @@ for algo_index, algo in enumerate(algorithms):
     solved_mazes = []
     unsolved_mazes = []
 
+    maze_paths = []
     for i in range(mazes_per_algorithm):
         maze_index = algo_index * mazes_per_algorithm + i
         maze_path = os.path.join(maze_folder, f"maze_{maze_index}.txt")
@@ -78,26 +86,42 @@ for algo_index, algo in enumerate(algorithms):
         # Generate only if it doesn't exist
         if generate_new and not os.path.exists(maze_path):
             generate_maze(index=maze_index, method="random")
-
-        # Run the algorithm
+        maze_paths.append(maze_path)
+
+    # Run the algorithm on every maze with a single search.py process pool, each maze with its own timeout.
+    # The timeout of the whole batch is only a safety net: the mazes which finished before it keep their results
+    try:
+        result = subprocess.run(
+            ["python", "search.py", *maze_paths, algo, "--json", "--jobs", str(os.cpu_count() or 1),
+             "--timeout", str(timeout_per_maze)],
+            capture_output=True,
+            text=True,
+            timeout=timeout_per_maze * mazes_per_algorithm
+        )
+        output = result.stdout
+    except subprocess.TimeoutExpired as e:
+        print(f"Timeout with {algo}")
+        output = e.stdout or ''
+        if isinstance(output, bytes):
+            output = output.decode(errors='replace')
+
+    results = {}
+    for line in output.splitlines():
         try:
-            result = subprocess.run(
-                ["python", "search.py", maze_path, algo],
-                capture_output=True,
-                text=True,
-                timeout=100
-            )
-
-            output = result.stdout.lower()
-            if 'true' in output:
-                success_count += 1
-                solved_mazes.append(f"maze_{maze_index}.txt")
-            else:
-                unsolved_mazes.append(f"maze_{maze_index}.txt")
-
-        except subprocess.TimeoutExpired:
-            print(f"Timeout on maze {maze_index} with {algo}")
-            unsolved_mazes.append(f"maze_{maze_index}.txt")
+            job = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        results[job['file']] = job
+
+    for maze_path in maze_paths:
+        job = results.get(maze_path, {})
+        if job.get('success'):
+            success_count += 1
+            solved_mazes.append(os.path.basename(maze_path))
+        elif job.get('timed_out'):
+            unsolved_mazes.append(f"{os.path.basename(maze_path)} (timed out)")
+        else:
+            unsolved_mazes.append(os.path.basename(maze_path))
     
     os.makedirs('results', exist_ok=True)
     summary_path = os.path.join("results", f"results_{algo}.txt")
@@ -109,3 +133,31 @@ for algo_index, algo in enumerate(algorithms):
         f.write("\n".join(unsolved_mazes) + "\n")
 
     print(f"Results saved to {summary_path}\n")
+
+# Check the expansion budget on a corridor: a search given exactly the expansions it needs must still
+# find its path, and one given one expansion less must be stopped with budget_exceeded
+print("=== Testing the expansion budget ===")
+budget_failures = []
+corridor = {'size': (1, 10), 'start': (0, 0), 'goals': [(9, 0)], 'walls': set()}
+for algo in algorithms + ['hpa', 'smas']:
+    options = {'limit': 20} if algo in ['depthlimited', 'ids', 'idas'] else {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        maze = Maze(**corridor)
+        maze._run(maze.iter_solve(algo, **options), None, algo.upper())
+        needed, path = maze.num_explored_multiple, maze.solution_multiple
+
+        exact = Maze(**corridor)
+        exact._run(exact.iter_solve(algo, **options), None, algo.upper(), max_expansions=needed)
+        short = Maze(**corridor)
+        short._run(short.iter_solve(algo, **options), None, algo.upper(), max_expansions=needed - 1)
+
+    if not exact.success or exact.budget_exceeded or exact.solution_multiple != path:
+        budget_failures.append(f"{algo}: not solved with exactly {needed} expansions")
+    if short.success or not short.budget_exceeded:
+        budget_failures.append(f"{algo}: not stopped with {needed - 1} expansions")
+
+summary_path = os.path.join("results", "results_budget.txt")
+with open(summary_path, "w") as f:
+    f.write(f"Expansion budget: {len(budget_failures)} failures\n")
+    f.write("\n".join(budget_failures) + "\n")
+print(f"Results saved to {summary_path}\n")
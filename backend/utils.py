@@ -1,4 +1,5 @@
 import re
+import time
 
 # Create a read_maze function(file) -> return the walls, start, and goals
 def read_maze(file):
@@ -44,4 +45,16 @@ def manhattan_distance(current_node, goal_node):
     x_current, y_current = current_node
     x_goal, y_goal = goal_node
     distance = abs(x_goal - x_current) + abs(y_goal - y_current)
-    return distance
\ No newline at end of file
+    return distance
+
+
+# Raised by the parts of a search which run for long without giving out events (the HPA* abstraction,
+# the parallel work units) once the deadline of the search has passed
+class DeadlineExceeded(Exception):
+    pass
+
+
+# Raise DeadlineExceeded when the deadline (a time.time() timestamp, or None for no deadline) has passed
+def check_deadline(deadline):
+    if deadline is not None and time.time() > deadline:
+        raise DeadlineExceeded()
@@ -1,4 +1,5 @@
 import React, { useState, useEffect, useCallback, useRef } from 'react';
+import MazeCanvas from './MazeCanvas';
 
 const MazeSolver = () => {
   // State management
@@ -12,8 +13,8 @@ const MazeSolver = () => {
   const [isSearching, setIsSearching] = useState(false);
   const [result, setResult] = useState(null);
   const [visualization, setVisualization] = useState({
-    explored: new Map(),
-    path: [],
+    exploredCount: 0,
+    pathLength: 0,
     selectedGoal: null,
     currentDepth: 0,
     maxDepth: 0,
@@ -23,6 +24,9 @@ const MazeSolver = () => {
   const [uploadedFile, setUploadedFile] = useState(null);
   const [shouldRegenerate, setShouldRegenerate] = useState(true);
   const fileInputRef = useRef(null);
+  const rendererRef = useRef(null);
+  // the number of the running animation, so starting a new one (or a reset) stops the previous one
+  const animationRef = useRef(0);
 
   const isLocalhost = window.location.hostname === 'localhost';
   const backendUrl_solve = isLocalhost
@@ -41,7 +45,10 @@ const MazeSolver = () => {
     { id: 'backtracking', name: 'Backtracking' },
     { id: 'depthlimited', name: 'Depth-Limited Search' },
     { id: 'ids', name: 'Iterative Deepening DFS' },
-    { id: 'idas', name: 'Iterative Deepening A*' }
+    { id: 'idas', name: 'Iterative Deepening A*' },
+    { id: 'hpa', name: 'Hierarchical A* (HPA*)' },
+    { id: 'smas', name: 'Memory-bounded A* (SMA*)' },
+    { id: 'auto', name: 'Auto (fastest shortest path)' }
   ];
 
   const isIterativeAlgorithm = () => {
@@ -130,8 +137,8 @@ const MazeSolver = () => {
       const text = await file.text();
       const { rows, cols, start, goals: parsedGoals, walls } = parseMazeFile(text);
 
-      if (rows < 5 || cols < 5 || rows > 50 || cols > 50) {
-        alert('Invalid dimensions. Rows and cols should be between 5-50');
+      if (rows < 5 || cols < 5 || rows > 1000 || cols > 1000) {
+        alert('Invalid dimensions. Rows and cols should be between 5-1000');
         return;
       }
 
@@ -212,9 +219,11 @@ const MazeSolver = () => {
 
   const resetVisualization = (preserveStart = false) => {
     setResult(null);
+    animationRef.current++;
+    rendererRef.current?.reset();
     setVisualization({
-      explored: new Map(),
-      path: [],
+      exploredCount: 0,
+      pathLength: 0,
       selectedGoal: null,
       currentDepth: 0,
       maxDepth: 0,
@@ -227,7 +236,6 @@ const MazeSolver = () => {
   };
 
   const indexToCoord = (index) => [index % config.cols, Math.floor(index / config.cols)];
-  const coordToIndex = ([x, y]) => y * config.cols + x;
 
   const convertMazeToGrid = () => {
     const grid = [];
@@ -242,24 +250,63 @@ const MazeSolver = () => {
     return grid;
   };
 
+  // Turn the [x, y] cells of a response into a flat typed array of cell indices
+  const toIndices = (cells) => {
+    const indices = new Int32Array(cells.length);
+    for (let i = 0; i < cells.length; i++) {
+      indices[i] = cells[i][1] * config.cols + cells[i][0];
+    }
+    return indices;
+  };
+
+  const nextFrame = () => new Promise(resolve => requestAnimationFrame(resolve));
+
+  // Draw indices[from..to) with draw, one batch per animation frame at rate cells per millisecond
+  // (all at once when rate is Infinity). Returns false when a newer animation or a reset stopped it.
+  const drawInFrames = async (animation, indices, from, to, draw, rate, onProgress) => {
+    let drawn = from;
+    let lastUpdate = 0;
+    const startTime = performance.now();
+    while (drawn < to) {
+      const now = await nextFrame();
+      if (animation !== animationRef.current) return false;
+      const due = Math.min(to, Math.max(drawn + 1, from + Math.floor((now - startTime) * rate)));
+      draw(indices, drawn, due);
+      drawn = due;
+      // the counters are React state, so they are only updated a few times per second
+      if (now - lastUpdate > 100 || drawn === to) {
+        lastUpdate = now;
+        onProgress(drawn);
+      }
+    }
+    return true;
+  };
+
   const animateVisualization = async (exploredNodes, pathNodes, isIterative = false) => {
+    const renderer = rendererRef.current;
+    if (!renderer) return;
+    const animation = ++animationRef.current;
+
     const speedMap = { slow: 150, normal: 75, fast: 30, instant: 0 };
+    // the longest the exploration may take at each speed, so a search with many cells still plays in seconds
+    const durationMap = { slow: 20000, normal: 10000, fast: 4000, instant: 0 };
     const delay = speedMap[config.speed];
+    const cellRate = (cellDelay, count, duration) =>
+      cellDelay > 0 ? Math.max(1 / cellDelay, count / duration) : Infinity;
+
+    const explored = toIndices(exploredNodes);
+    const path = toIndices(pathNodes);
+    renderer.reset();
+    setVisualization(prev => ({ ...prev, exploredCount: 0, pathLength: 0, currentDepth: 0, maxDepth: 0 }));
 
     if (isIterative) {
       // For iterative algorithms, group nodes by depth and animate depth by depth
-      const nodesByDepth = new Map();
-      exploredNodes.forEach((node, index) => {
-        const depth = Math.floor(index / Math.max(1, Math.sqrt(exploredNodes.length)));
-        if (!nodesByDepth.has(depth)) {
-          nodesByDepth.set(depth, []);
-        }
-        nodesByDepth.get(depth).push(node);
-      });
+      const groupSize = Math.max(1, Math.sqrt(explored.length));
+      const groupEnd = (depth) => Math.min(explored.length, Math.ceil((depth + 1) * groupSize));
+      const maxDepth = explored.length > 0 ? Math.floor((explored.length - 1) / groupSize) : 0;
+      const rate = cellRate(delay / 2, explored.length, durationMap[config.speed]);
 
-      const maxDepth = Math.max(...nodesByDepth.keys());
-
-      for (let depth = 0; depth <= maxDepth; depth++) {
+      for (let depth = 0; depth <= maxDepth && explored.length > 0; depth++) {
         setVisualization(prev => ({
           ...prev,
           currentDepth: depth,
@@ -267,70 +314,37 @@ const MazeSolver = () => {
           currentIteration: depth + 1
         }));
 
-        // Clear and re-animate up to current depth
-        const exploredAtDepth = new Map();
-        let nodeIndex = 0;
-
-        for (let d = 0; d <= depth; d++) {
-          const nodesAtThisDepth = nodesByDepth.get(d) || [];
-          for (const [x, y] of nodesAtThisDepth) {
-            const index = coordToIndex([x, y]);
-            exploredAtDepth.set(index, d);
-
-            setVisualization(prev => ({
-              ...prev,
-              explored: new Map(exploredAtDepth),
-              currentDepth: depth,
-              maxDepth: maxDepth
-            }));
-
-            if (delay > 0) await new Promise(resolve => setTimeout(resolve, delay / 2));
-            nodeIndex++;
-          }
-        }
+        // Every iteration starts over: the earlier depths are drawn at once, then the new depth is animated
+        const from = depth > 0 ? groupEnd(depth - 1) : 0;
+        renderer.reset();
+        renderer.drawExplored(explored, 0, from);
+        const finished = await drawInFrames(animation, explored, from, groupEnd(depth), renderer.drawExplored, rate,
+          drawn => setVisualization(prev => ({ ...prev, exploredCount: drawn })));
+        if (!finished) return;
 
         if (delay > 0) await new Promise(resolve => setTimeout(resolve, delay * 3));
+        if (animation !== animationRef.current) return;
       }
     } else {
       // Regular animation
-      setVisualization(prev => ({
-        ...prev,
-        explored: new Map(),
-        path: [],
-        selectedGoal: null,
-        currentDepth: 0,
-        maxDepth: 0
-      }));
-
-      const exploredWithDepth = new Map();
-
-      for (let i = 0; i < exploredNodes.length; i++) {
-        const [x, y] = exploredNodes[i];
-        const index = coordToIndex([x, y]);
-        const depth = isDepthLimitedAlgorithm() ? Math.min(Math.floor(i / 5), config.depthLimit) : 0;
-
-        exploredWithDepth.set(index, depth);
-
-        setVisualization(prev => ({
-          ...prev,
-          explored: new Map(exploredWithDepth),
-          currentDepth: depth,
-          maxDepth: Math.max(prev.maxDepth, depth)
-        }));
-
-        if (delay > 0) await new Promise(resolve => setTimeout(resolve, delay));
-      }
+      const finished = await drawInFrames(animation, explored, 0, explored.length, renderer.drawExplored,
+        cellRate(delay, explored.length, durationMap[config.speed]),
+        drawn => {
+          const depth = isDepthLimitedAlgorithm() ? Math.min(Math.floor((drawn - 1) / 5), config.depthLimit) : 0;
+          setVisualization(prev => ({
+            ...prev,
+            exploredCount: drawn,
+            currentDepth: depth,
+            maxDepth: Math.max(prev.maxDepth, depth)
+          }));
+        });
+      if (!finished) return;
     }
 
     // Animate path
-    for (const [x, y] of pathNodes) {
-      const index = coordToIndex([x, y]);
-      setVisualization(prev => ({
-        ...prev,
-        path: [...prev.path, index]
-      }));
-      if (delay > 0) await new Promise(resolve => setTimeout(resolve, delay * 2));
-    }
+    await drawInFrames(animation, path, 0, path.length, renderer.drawPath,
+      cellRate(delay * 2, path.length, durationMap[config.speed] / 4),
+      drawn => setVisualization(prev => ({ ...prev, pathLength: drawn })));
   };
 
   const handleSolve = async () => {
@@ -455,7 +469,7 @@ const MazeSolver = () => {
                     <span className="text-blue-800 font-medium">🔍 Searching with {algorithms.find(a => a.id === config.algorithm)?.name}</span>
                   </div>
                   <div className="text-sm text-blue-600 font-mono bg-white bg-opacity-50 px-2 py-1 rounded">
-                    Explored: {visualization.explored.size} nodes
+                    Explored: {visualization.exploredCount} nodes
                   </div>
                 </div>
 
@@ -471,27 +485,27 @@ const MazeSolver = () => {
                 <div className="w-full bg-blue-200 rounded-full h-2 overflow-hidden">
                   <div
                     className="bg-gradient-to-r from-blue-500 to-indigo-500 h-2 rounded-full transition-all duration-500 ease-out"
-                    style={{ width: `${Math.min(100, (visualization.explored.size / (config.rows * config.cols * 0.3)) * 100)}%` }}
+                    style={{ width: `${Math.min(100, (visualization.exploredCount / (config.rows * config.cols * 0.3)) * 100)}%` }}
                   ></div>
                 </div>
               </div>
             )}
 
-            {visualization.explored.size > 0 && !isSearching && (
+            {visualization.exploredCount > 0 && !isSearching && (
               <div className="mb-4 p-3 bg-gradient-to-r from-indigo-50 to-purple-50 rounded-lg border border-indigo-200">
                 <div className="grid grid-cols-1 md:grid-cols-3 gap-3 text-sm">
                   <div className="bg-white bg-opacity-60 rounded px-3 py-2">
                     <span className="font-medium text-indigo-800">Total Explored:</span>
-                    <span className="ml-1 font-mono text-indigo-900 font-bold">{visualization.explored.size}</span>
+                    <span className="ml-1 font-mono text-indigo-900 font-bold">{visualization.exploredCount}</span>
                   </div>
                   <div className="bg-white bg-opacity-60 rounded px-3 py-2">
                     <span className="font-medium text-indigo-800">Path Length:</span>
-                    <span className="ml-1 font-mono text-indigo-900 font-bold">{visualization.path.length}</span>
+                    <span className="ml-1 font-mono text-indigo-900 font-bold">{visualization.pathLength}</span>
                   </div>
                   <div className="bg-white bg-opacity-60 rounded px-3 py-2">
                     <span className="font-medium text-indigo-800">Efficiency:</span>
                     <span className="ml-1 font-mono text-indigo-900 font-bold">
-                      {visualization.path.length > 0 ? Math.round((visualization.path.length / visualization.explored.size) * 100) : 0}%
+                      {visualization.pathLength > 0 ? Math.round((visualization.pathLength / visualization.exploredCount) * 100) : 0}%
                     </span>
                   </div>
                 </div>
@@ -499,86 +513,17 @@ const MazeSolver = () => {
             )}
 
             <div className="bg-gray-100 p-4 rounded-lg mb-4 shadow-inner w-full">
-              <div
-                className="relative mx-auto w-full max-w-full"
-                style={{
-                  width: '100%',
-                  aspectRatio: `${config.cols} / ${config.rows}`, // maintain square layout
-                }}
-              >
-                <div
-                  className="absolute inset-0 grid gap-[1px]"
-                  style={{
-                    gridTemplateColumns: `repeat(${config.cols}, 1fr)`,
-                    gridTemplateRows: `repeat(${config.rows}, 1fr)`,
-                  }}
-                >
-                  {maze.map((cell, i) => {
-                    const [x, y] = indexToCoord(i);
-                    const isStart = startPos && startPos[0] === x && startPos[1] === y;
-                    const isGoal = cell?.type === 'goal';
-                    const isExplored = visualization.explored.has(i);
-                    const isPath = visualization.path.includes(i);
-                    const isSelectedGoal =
-                      visualization.selectedGoal !== null &&
-                      isGoal &&
-                      goals.findIndex(([gx, gy]) => gx === x && gy === y) ===
-                        visualization.selectedGoal;
-
-                    let cellClass =
-                      'aspect-square border border-gray-300 cursor-pointer transition-all duration-300 relative overflow-hidden ';
-
-                    if (isStart) {
-                      cellClass +=
-                        'bg-green-500 border-2 border-green-700 shadow-lg z-30';
-                    } else if (isSelectedGoal) {
-                      cellClass +=
-                        'bg-red-600 shadow-lg border-2 border-red-800 z-20 ring-2 ring-red-300';
-                    } else if (isGoal) {
-                      cellClass +=
-                        'bg-red-400 border-2 border-red-600 shadow-md z-20';
-                    } else if (isPath) {
-                      cellClass +=
-                        'bg-yellow-400 animate-pulse shadow-lg border-2 border-yellow-600 z-10';
-                    } else if (isExplored) {
-                      cellClass += 'bg-blue-300 shadow-sm border-blue-400';
-                    } else if (cell?.type === 'wall') {
-                      cellClass += 'bg-gray-800 border-gray-700';
-                    } else {
-                      cellClass +=
-                        'bg-gray-50 hover:bg-gray-100 border-gray-200';
-                    }
-
-                    return (
-                      <div
-                        key={i}
-                        className={cellClass}
-                        onClick={() => handleCellClick(i)}
-                      >
-                        {isStart && (
-                          <div className="absolute inset-0 flex items-center justify-center z-40">
-                            <div className="w-4 h-4 bg-white rounded-full shadow-lg border-2 border-green-800 flex items-center justify-center">
-                              <span className="text-xs font-bold text-green-800">S</span>
-                            </div>
-                          </div>
-                        )}
-                        {isGoal && !isStart && (
-                          <div className="absolute inset-0 flex items-center justify-center z-30">
-                            <div className="w-4 h-4 bg-white rounded-full shadow-lg border-2 border-red-800 flex items-center justify-center">
-                              <span className="text-xs font-bold text-red-800">G</span>
-                            </div>
-                          </div>
-                        )}
-                        {isPath && !isStart && !isGoal && (
-                          <div className="absolute inset-0 flex items-center justify-center z-5">
-                            <div className="w-2 h-2 bg-yellow-600 rounded-full animate-ping"></div>
-                          </div>
-                        )}
-                      </div>
-                    );
-                  })}
-                </div>
-              </div>
+              <MazeCanvas
+                ref={rendererRef}
+                rows={config.rows}
+                cols={config.cols}
+                maze={maze}
+                startPos={startPos}
+                goals={goals}
+                selectedGoal={visualization.selectedGoal}
+                onCellClick={handleCellClick}
+                className={isSettingStart ? 'cursor-crosshair' : 'cursor-pointer'}
+              />
             </div>
 
             <div className="flex flex-wrap gap-3 mb-4">
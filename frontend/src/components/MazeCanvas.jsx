@@ -0,0 +1,226 @@
+import React, { forwardRef, useCallback, useEffect, useImperativeHandle, useRef } from 'react';
+
+// The colours of the cells, the same Tailwind colours the grid of divs used
+const COLORS = {
+  empty: '#f9fafb',        // gray-50
+  wall: '#1f2937',         // gray-800
+  explored: '#93c5fd',     // blue-300
+  path: '#facc15',         // yellow-400
+  goal: '#f87171',         // red-400
+  selectedGoal: '#dc2626', // red-600
+  start: '#22c55e',        // green-500
+  grid: '#d1d5db'          // gray-300
+};
+
+// An ImageData holds RGBA bytes, so a colour is written as one 32-bit word whose byte order depends on the platform
+const LITTLE_ENDIAN = new Uint8Array(new Uint32Array([1]).buffer)[0] === 1;
+const packColor = (hex) => {
+  const [r, g, b] = [1, 3, 5].map(i => parseInt(hex.slice(i, i + 2), 16));
+  return (LITTLE_ENDIAN ? (255 << 24) | (b << 16) | (g << 8) | r : (r << 24) | (g << 16) | (b << 8) | 255) >>> 0;
+};
+const PIXELS = Object.fromEntries(Object.entries(COLORS).map(([name, hex]) => [name, packColor(hex)]));
+
+// What the search drew on a cell
+const UNSEEN = 0;
+const EXPLORED = 1;
+const PATH = 2;
+
+// Below these sizes (in CSS pixels) a cell is too small for its grid lines or its S / G marker
+const MIN_GRID_CELL = 6;
+const MIN_MARKER_CELL = 12;
+
+/*
+The maze is drawn on a canvas instead of one div per cell. Every cell is one pixel
+of an off-screen ImageData (cols x rows), written through a Uint32Array, and the
+canvas scales that image up with a single drawImage per frame. Drawing a batch of
+explored cells only writes their pixels, so the cost of a frame does not depend on
+how many cells were drawn before it, and a 1000x1000 grid is one 4 MB image.
+
+The parent drives the animation through the ref:
++ reset(): clear the explored cells and the path
++ drawExplored(indices, from, to) / drawPath(indices, from, to): draw the cells
+indices[from..to) of a flat typed array of cell indices (y * cols + x)
+Every change is shown on the next animation frame, once however many batches came in.
+*/
+const MazeCanvas = forwardRef(({ rows, cols, maze, startPos, goals, selectedGoal, onCellClick, className = '' }, ref) => {
+  const containerRef = useRef(null);
+  const canvasRef = useRef(null);
+  const layerRef = useRef(null);
+  const frameRef = useRef(0);
+
+  const render = useCallback(() => {
+    frameRef.current = 0;
+    const canvas = canvasRef.current;
+    const layer = layerRef.current;
+    if (!canvas || !layer || canvas.width === 0) return;
+
+    layer.context.putImageData(layer.image, 0, 0);
+    const context = canvas.getContext('2d');
+    context.imageSmoothingEnabled = false;
+    context.drawImage(layer.canvas, 0, 0, canvas.width, canvas.height);
+
+    const cellWidth = canvas.width / cols;
+    const cellHeight = canvas.height / rows;
+    const ratio = window.devicePixelRatio || 1;
+
+    if (Math.min(cellWidth, cellHeight) / ratio >= MIN_GRID_CELL) {
+      context.beginPath();
+      for (let x = 1; x < cols; x++) {
+        const position = Math.round(x * cellWidth) + 0.5;
+        context.moveTo(position, 0);
+        context.lineTo(position, canvas.height);
+      }
+      for (let y = 1; y < rows; y++) {
+        const position = Math.round(y * cellHeight) + 0.5;
+        context.moveTo(0, position);
+        context.lineTo(canvas.width, position);
+      }
+      context.strokeStyle = COLORS.grid;
+      context.lineWidth = 1;
+      context.stroke();
+    }
+
+    if (Math.min(cellWidth, cellHeight) / ratio >= MIN_MARKER_CELL) {
+      const radius = Math.min(cellWidth, cellHeight) * 0.3;
+      context.font = `bold ${Math.round(radius * 1.2)}px sans-serif`;
+      context.textAlign = 'center';
+      context.textBaseline = 'middle';
+      const drawMarker = ([x, y], label, color) => {
+        const centerX = (x + 0.5) * cellWidth;
+        const centerY = (y + 0.5) * cellHeight;
+        context.beginPath();
+        context.arc(centerX, centerY, radius, 0, 2 * Math.PI);
+        context.fillStyle = '#ffffff';
+        context.fill();
+        context.lineWidth = Math.max(1, radius * 0.25);
+        context.strokeStyle = color;
+        context.stroke();
+        context.fillStyle = color;
+        context.fillText(label, centerX, centerY);
+      };
+      goals.forEach(goal => drawMarker(goal, 'G', '#991b1b'));
+      if (startPos) drawMarker(startPos, 'S', '#166534');
+    }
+  }, [rows, cols, goals, startPos]);
+
+  const invalidate = useCallback(() => {
+    if (!frameRef.current) {
+      frameRef.current = requestAnimationFrame(render);
+    }
+  }, [render]);
+
+  useEffect(() => () => cancelAnimationFrame(frameRef.current), []);
+
+  // The off-screen image and the flat arrays of the grid, rebuilt when its size changes
+  useEffect(() => {
+    const canvas = document.createElement('canvas');
+    canvas.width = cols;
+    canvas.height = rows;
+    const context = canvas.getContext('2d');
+    const image = context.createImageData(cols, rows);
+    layerRef.current = {
+      canvas,
+      context,
+      image,
+      pixels: new Uint32Array(image.data.buffer),
+      base: new Uint32Array(rows * cols),     // the colour of every cell without the search
+      marked: new Uint8Array(rows * cols),    // 1 for the start and the goals, which stay on top
+      cells: new Uint8Array(rows * cols)      // UNSEEN, EXPLORED or PATH
+    };
+  }, [rows, cols]);
+
+  // The colours of the walls, the start and the goals, with the cells the search drew kept over them
+  useEffect(() => {
+    const layer = layerRef.current;
+    if (!layer || maze.length !== rows * cols) return;
+    const { base, marked, cells, pixels } = layer;
+
+    for (let i = 0; i < base.length; i++) {
+      base[i] = maze[i]?.type === 'wall' ? PIXELS.wall : PIXELS.empty;
+    }
+    marked.fill(0);
+    goals.forEach(([x, y], i) => {
+      const index = y * cols + x;
+      base[index] = i === selectedGoal ? PIXELS.selectedGoal : PIXELS.goal;
+      marked[index] = 1;
+    });
+    if (startPos) {
+      const index = startPos[1] * cols + startPos[0];
+      base[index] = PIXELS.start;
+      marked[index] = 1;
+    }
+
+    for (let i = 0; i < pixels.length; i++) {
+      pixels[i] = marked[i] || cells[i] === UNSEEN ? base[i] : cells[i] === PATH ? PIXELS.path : PIXELS.explored;
+    }
+    invalidate();
+  }, [maze, rows, cols, startPos, goals, selectedGoal, invalidate]);
+
+  // The canvas follows the width of its container, at the resolution of the screen
+  useEffect(() => {
+    const container = containerRef.current;
+    const resize = () => {
+      const ratio = window.devicePixelRatio || 1;
+      const width = Math.max(1, Math.round(container.clientWidth * ratio));
+      const canvas = canvasRef.current;
+      canvas.width = width;
+      canvas.height = Math.max(1, Math.round(width * rows / cols));
+      render();
+    };
+    resize();
+    const observer = new ResizeObserver(resize);
+    observer.observe(container);
+    return () => observer.disconnect();
+  }, [rows, cols, render]);
+
+  useImperativeHandle(ref, () => ({
+    reset: () => {
+      const layer = layerRef.current;
+      if (!layer) return;
+      layer.cells.fill(UNSEEN);
+      layer.pixels.set(layer.base);
+      invalidate();
+    },
+    drawExplored: (indices, from, to) => {
+      const { cells, marked, pixels } = layerRef.current;
+      for (let k = from; k < to; k++) {
+        const index = indices[k];
+        if (cells[index] === PATH) continue;
+        cells[index] = EXPLORED;
+        if (!marked[index]) pixels[index] = PIXELS.explored;
+      }
+      invalidate();
+    },
+    drawPath: (indices, from, to) => {
+      const { cells, marked, pixels } = layerRef.current;
+      for (let k = from; k < to; k++) {
+        const index = indices[k];
+        cells[index] = PATH;
+        if (!marked[index]) pixels[index] = PIXELS.path;
+      }
+      invalidate();
+    }
+  }), [invalidate]);
+
+  const handleClick = (event) => {
+    const rect = canvasRef.current.getBoundingClientRect();
+    const x = Math.floor((event.clientX - rect.left) / rect.width * cols);
+    const y = Math.floor((event.clientY - rect.top) / rect.height * rows);
+    if (x >= 0 && x < cols && y >= 0 && y < rows) {
+      onCellClick(y * cols + x);
+    }
+  };
+
+  return (
+    <div ref={containerRef} className={`w-full ${className}`}>
+      <canvas
+        ref={canvasRef}
+        onClick={handleClick}
+        className="block w-full rounded"
+        style={{ aspectRatio: `${cols} / ${rows}` }}
+      />
+    </div>
+  );
+});
+
+export default MazeCanvas;